@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import db  # noqa: F401
+        if settings.TEMPLATE_PROFILING:
+            from . import template_profiler
+            template_profiler.install()
+        if settings.TEMPLATES_WARMUP:
+            from .warmup import warm_up
+            warm_up()
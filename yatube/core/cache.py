@@ -0,0 +1,281 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+Чтения горячих ключей обслуживаются из памяти, промахи идут в общий
+кэш (SHARED). Каждая запись дописывает ключ в журнал инвалидаций —
+файл LOCATION, общий для процессов сервера. Процессы не чаще раза в
+SYNC_INTERVAL секунд дочитывают журнал и выбрасывают изменённые ключи,
+поэтому чужая запись видна не позже чем через SYNC_INTERVAL, а своя —
+сразу. Записи в памяти живут не дольше LOCAL_TIMEOUT секунд.
+
+Пример настройки:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'LOCATION': '/var/tmp/yatube/invalidations.log',
+            'OPTIONS': {'SHARED': 'shared'},
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/var/tmp/yatube/cache',
+        },
+    }
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CLEAR_ALL = '*'
+MISSING = object()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """LRU процесса и позиция в журнале инвалидаций, общие для потоков."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.inode = None
+        self.offset = 0
+        self.position = 0
+        self.synced_at = 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, pickled = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def put(self, key, value, timeout, position):
+        """Кладёт значение, если журнал не сдвинулся с момента чтения."""
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            if position != self.position:
+                return
+            self.entries[key] = (time.monotonic() + timeout, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def evict(self, keys):
+        with self.lock:
+            self.position += 1
+            if CLEAR_ALL in keys:
+                self.entries.clear()
+                return
+            for key in keys:
+                self.entries.pop(key, None)
+
+
+class TwoTierCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.log_path = location
+        self.shared_alias = options['SHARED']
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.sync_interval = options.get('SYNC_INTERVAL', 0.5)
+        self.log_max_bytes = options.get('LOG_MAX_BYTES', 1024 * 1024)
+        with _stores_lock:
+            if location not in _stores:
+                _stores[location] = LocalStore(
+                    options.get('LOCAL_MAX_ENTRIES', 10000)
+                )
+            self.store = _stores[location]
+        if not os.path.exists(location):
+            self._rotate()
+        if self.store.inode is None:
+            self.sync(force=True)
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def sync(self, force=False):
+        """Дочитывает журнал и выбрасывает изменённые другими ключи."""
+        store = self.store
+        now = time.monotonic()
+        if not force and now - store.synced_at < self.sync_interval:
+            return
+        if not store.sync_lock.acquire(blocking=force):
+            return
+        try:
+            store.synced_at = now
+            self._read_log()
+        finally:
+            store.sync_lock.release()
+
+    def _read_log(self):
+        store = self.store
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            self._rotate()
+            stat = os.stat(self.log_path)
+        if stat.st_ino != store.inode or stat.st_size < store.offset:
+            store.evict([CLEAR_ALL])
+            store.inode = stat.st_ino
+            store.offset = stat.st_size
+            return
+        if stat.st_size == store.offset:
+            return
+        with open(self.log_path, 'rb') as log:
+            log.seek(store.offset)
+            chunk = log.read(stat.st_size - store.offset)
+        complete = chunk.rfind(b'\n') + 1
+        store.offset += complete
+        store.evict(chunk[:complete].decode().splitlines())
+
+    def _broadcast(self, *keys):
+        """Дописывает ключи в журнал и выбрасывает их у себя.
+
+        Если журнал прочитан до места записи, свои строки пропускаются,
+        чтобы не выбросить только что записанное значение.
+        """
+        data = ''.join(f'{key}\n' for key in keys).encode()
+        store = self.store
+        with store.sync_lock:
+            with open(self.log_path, 'ab') as log:
+                log.write(data)
+                log.flush()
+                end = log.tell()
+                inode = os.fstat(log.fileno()).st_ino
+            if inode == store.inode and store.offset == end - len(data):
+                store.offset = end
+        store.evict(keys)
+        if end > self.log_max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Начинает новый журнал: процессы увидят смену inode и сбросят
+        свою память целиком."""
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{self.log_path}.{os.getpid()}.tmp'
+        open(temporary, 'w').close()
+        os.replace(temporary, self.log_path)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        self.sync()
+        value = self.store.get(local_key)
+        if value is not MISSING:
+            return value
+        position = self.store.position
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        self.store.put(local_key, value, self.local_timeout, position)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found = {}
+        missed = []
+        for key in keys:
+            value = self.store.get(self._local_key(key, version))
+            if value is MISSING:
+                missed.append(key)
+            else:
+                found[key] = value
+        if missed:
+            position = self.store.position
+            fetched = self.shared.get_many(missed, version=version)
+            for key, value in fetched.items():
+                self.store.put(
+                    self._local_key(key, version), value,
+                    self.local_timeout, position
+                )
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self._local_key(key, version)
+        self.shared.set(
+            key, value, self._shared_timeout(timeout),
+            version=version
+        )
+        self._broadcast(local_key)
+        self.store.put(
+            local_key, value, self._local_ttl(timeout), self.store.position
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(
+            key, value, self._shared_timeout(timeout),
+            version=version
+        )
+        if added:
+            self._broadcast(self._local_key(key, version))
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(
+            data, self._shared_timeout(timeout), version=version
+        )
+        if data:
+            self._broadcast(*(self._local_key(key, version) for key in data))
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(
+            key, self._shared_timeout(timeout), version=version
+        )
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self._broadcast(self._local_key(key, version))
+        return value
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self._broadcast(self._local_key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        if keys:
+            self._broadcast(*(self._local_key(key, version) for key in keys))
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def clear(self):
+        self.shared.clear()
+        self._broadcast(CLEAR_ALL)
+
+    def _shared_timeout(self, timeout):
+        """Таймаут для общего кэша: по умолчанию — свой TIMEOUT."""
+        if timeout is DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
@@ -0,0 +1,48 @@
+"""Настройка соединений SQLite (WAL, synchronous, mmap, кэш, ожидание)
+и вставка без ошибки при конфликте.
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite.
+
+    Для отдельной базы набор можно переопределить ключом SQLITE_PRAGMAS
+    в её описании в DATABASES.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get(
+        'SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS
+    )
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def insert_ignore(using, model, **values):
+    """INSERT ... ON CONFLICT DO NOTHING одной строки.
+
+    В отличие от get_or_create — один запрос без гонки между проверкой
+    и вставкой. Возвращает True, если строка добавлена.
+    """
+    connection = connections[using]
+    ops = connection.ops
+    meta = model._meta
+    columns = ', '.join(
+        ops.quote_name(meta.get_field(name).column) for name in values
+    )
+    placeholders = ', '.join(['%s'] * len(values))
+    sql = ' '.join(filter(None, [
+        ops.insert_statement(ignore_conflicts=True),
+        ops.quote_name(meta.db_table),
+        f'({columns}) VALUES ({placeholders})',
+        ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+    ]))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, list(values.values()))
+        return cursor.rowcount == 1
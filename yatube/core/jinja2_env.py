@@ -0,0 +1,54 @@
+"""Окружение Jinja2 с аналогами тегов и фильтров Django-шаблонов."""
+import logging
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date, linebreaksbr, truncatechars
+from jinja2 import Environment
+from markupsafe import Markup
+from sorl.thumbnail import get_thumbnail
+
+from core.fast_urls import fast_reverse
+from core.templatetags.user_filters import addclass
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail(image, geometry, **options):
+    """Аналог {% thumbnail %}: миниатюра или None, если картинки нет."""
+    if not image:
+        return None
+    try:
+        return get_thumbnail(image, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру %s', image)
+        return None
+
+
+def cached(timeout, fragment_name, *vary_on, caller):
+    """Аналог {% cache %}: {% call cached(60, 'name', var) %}...{% endcall %}.
+    """
+    key = make_template_fragment_key(f'jinja2:{fragment_name}', vary_on)
+    value = cache.get(key)
+    if value is None:
+        value = caller()
+        cache.set(key, value, timeout)
+    return Markup(value)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': staticfiles_storage.url,
+        'url': fast_reverse,
+        'thumbnail': thumbnail,
+        'cached': cached,
+    })
+    env.filters.update({
+        'date': date,
+        'linebreaksbr': linebreaksbr,
+        'truncatechars': truncatechars,
+        'addclass': addclass,
+    })
+    return env
@@ -0,0 +1,58 @@
+import statistics
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.engine import Engine
+from django.test import Client
+from django.urls import get_resolver, get_ns_resolver
+
+from core.warmup import warm_up
+
+
+def reset_process_caches():
+    """Сбрасывает шаблоны и резолвер, как в только что форкнутом воркере."""
+    engines._engines = {}
+    Engine.get_default.cache_clear()
+    get_resolver.cache_clear()
+    get_ns_resolver.cache_clear()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку первого запроса после старта воркера '
+        'с прогревом и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--steady', type=int, default=200)
+
+    def handle(self, *args, **options):
+        client = Client()
+        path = options['path']
+
+        def timed_get():
+            start = perf_counter()
+            client.get(path)
+            return (perf_counter() - start) * 1000
+
+        cold, warmed = [], []
+        for _ in range(options['rounds']):
+            reset_process_caches()
+            cold.append(timed_get())
+            reset_process_caches()
+            warm_up()
+            warmed.append(timed_get())
+        steady = [timed_get() for _ in range(options['steady'])]
+
+        for title, samples in (
+            ('Холодный запрос', cold),
+            ('Первый запрос после warm_up', warmed),
+            ('Установившийся режим', steady),
+        ):
+            self.stdout.write(
+                f'{title}: медиана {statistics.median(samples):.2f} мс, '
+                f'максимум {max(samples):.2f} мс'
+            )
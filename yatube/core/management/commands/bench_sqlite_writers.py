@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = """
+CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT NOT NULL);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES post (id),
+    text TEXT NOT NULL
+);
+CREATE INDEX comment_post_id ON comment (post_id);
+"""
+POSTS = 2000
+
+
+def connect(path, tuned):
+    """Соединение как у Django: по умолчанию или с SQLITE_PRAGMAS."""
+    connection = sqlite3.connect(path, timeout=5 if not tuned else 20)
+    if tuned:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            connection.execute(f'PRAGMA {pragma} = {value}')
+    return connection
+
+
+def writer(path, tuned, duration, queue):
+    """Имитирует add_comment: проверка поста и вставка комментария."""
+    connection = connect(path, tuned)
+    done = errors = 0
+    deadline = perf_counter() + duration
+    number = os.getpid()
+    while perf_counter() < deadline:
+        number += 1
+        post_id = number % POSTS + 1
+        try:
+            with connection:
+                connection.execute(
+                    'SELECT id FROM post WHERE id = ?', (post_id,)
+                ).fetchone()
+                connection.execute(
+                    'INSERT INTO comment (post_id, text) VALUES (?, ?)',
+                    (post_id, 'комментарий ' * 10)
+                )
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    queue.put(('write', done, errors))
+
+
+def reader(path, tuned, duration, queue):
+    """Имитирует ленту: тяжёлое чтение с подсчётом комментариев."""
+    connection = connect(path, tuned)
+    done = errors = 0
+    deadline = perf_counter() + duration
+    while perf_counter() < deadline:
+        try:
+            connection.execute(
+                'SELECT post.id, count(comment.id) FROM post '
+                'LEFT JOIN comment ON comment.post_id = post.id '
+                'GROUP BY post.id ORDER BY 2 DESC LIMIT 10'
+            ).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    queue.put(('read', done, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест конкурентных записей в SQLite: настройки по '
+        'умолчанию против SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5)
+
+    def run(self, tuned, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            connection = connect(path, tuned)
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                'INSERT INTO post (text) VALUES (?)',
+                [('пост',)] * POSTS
+            )
+            connection.commit()
+            connection.close()
+            queue = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(
+                    target=target,
+                    args=(path, tuned, options['duration'], queue)
+                )
+                for target, count in ((writer, options['writers']),
+                                      (reader, options['readers']))
+                for _ in range(count)
+            ]
+            for process in processes:
+                process.start()
+            totals = {'write': [0, 0], 'read': [0, 0]}
+            for _ in processes:
+                kind, done, errors = queue.get()
+                totals[kind][0] += done
+                totals[kind][1] += errors
+            for process in processes:
+                process.join()
+        duration = options['duration']
+        title = 'SQLITE_PRAGMAS' if tuned else 'По умолчанию'
+        self.stdout.write(
+            f'{title}: записей {totals["write"][0] / duration:.0f}/с, '
+            f'чтений {totals["read"][0] / duration:.0f}/с, '
+            f'ошибок "database is locked": '
+            f'{totals["write"][1] + totals["read"][1]}'
+        )
+
+    def handle(self, *args, **options):
+        self.run(False, options)
+        self.run(True, options)
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = 'Раздаёт события outbox зарегистрированным обработчикам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Раздать накопившиеся события и выйти.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        outbox.autodiscover()
+        databases = outbox.outbox_databases()
+        while True:
+            close_old_connections()
+            handled = sum(
+                self.drain(using, options['batch_size'])
+                for using in databases
+            )
+            if options['once']:
+                for using in databases:
+                    outbox.purge_delivered(using)
+                self.stdout.write(f'Обработано событий: {handled}')
+                break
+            if not handled:
+                for using in databases:
+                    outbox.purge_delivered(using)
+                time.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    def drain(self, using, batch_size):
+        handled = 0
+        while True:
+            count = outbox.dispatch_pending(using, batch_size)
+            handled += count
+            if count < batch_size:
+                return handled
@@ -0,0 +1,78 @@
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from core import taskqueue
+
+
+def run_task(task_row):
+    close_old_connections()
+    try:
+        return taskqueue.execute(task_row)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.taskqueue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.TASKS_WORKERS,
+            help='Число потоков, выполняющих задачи.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        if settings.TASKS_EAGER:
+            raise CommandError(
+                'TASKS_EAGER включён: задачи выполняются сразу, '
+                'воркер не нужен.'
+            )
+        taskqueue.autodiscover()
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        threads = options['threads']
+        running = set()
+        # Блокировка продлевается втрое чаще, чем истекает.
+        renew_every = settings.TASKS_VISIBILITY_TIMEOUT / 3
+        renewed = time.monotonic()
+        with ThreadPoolExecutor(threads, 'task-worker') as pool:
+            while True:
+                close_old_connections()
+                if not options['burst']:
+                    taskqueue.schedule_periodic()
+                running = {future for future in running
+                           if not self.report(future)}
+                if running and time.monotonic() - renewed >= renew_every:
+                    taskqueue.renew(
+                        worker, [future.task_row.pk for future in running]
+                    )
+                    renewed = time.monotonic()
+                claimed = taskqueue.claim(worker, threads - len(running))
+                for task_row in claimed:
+                    future = pool.submit(run_task, task_row)
+                    future.task_row = task_row
+                    running.add(future)
+                if options['burst'] and not claimed and not running:
+                    break
+                if not claimed:
+                    time.sleep(settings.TASKS_POLL_INTERVAL)
+
+    def report(self, future):
+        """Печатает итог завершённой задачи. False, если ещё идёт."""
+        if not future.done():
+            return False
+        status, duration = future.result()
+        task_row = future.task_row
+        self.stdout.write(
+            f'{task_row.name} #{task_row.pk}: {status} за {duration:.3f} с'
+        )
+        return True
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import replica
+
+
+class Command(BaseCommand):
+    help = 'Обновляет снимок основной базы для реплики чтения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Повторять каждые REPLICA_SNAPSHOT_INTERVAL секунд.'
+        )
+
+    def handle(self, *args, **options):
+        if replica.replica_alias() is None:
+            raise CommandError(
+                f'В DATABASES нет базы {settings.REPLICA_DATABASE!r}.'
+            )
+        while True:
+            duration = replica.snapshot()
+            self.stdout.write(f'Снимок реплики готов за {duration:.3f} с')
+            if not options['loop']:
+                break
+            time.sleep(settings.REPLICA_SNAPSHOT_INTERVAL)
@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Обслуживание SQLite: ANALYZE, PRAGMA optimize, инкрементальный '
+        'VACUUM и контрольная точка WAL. Запускайте по расписанию (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Алиас базы, по умолчанию все базы SQLite.'
+        )
+        parser.add_argument(
+            '--vacuum-pages', type=int, default=1000,
+            help='Сколько свободных страниц вернуть за один запуск.'
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='Перевести базу в auto_vacuum=INCREMENTAL (полный VACUUM).'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['databases'] or [
+            alias for alias in connections
+            if connections[alias].vendor == 'sqlite'
+        ]
+        for alias in aliases:
+            start = perf_counter()
+            with connections[alias].cursor() as cursor:
+                if options['enable_incremental_vacuum']:
+                    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                    cursor.execute('VACUUM')
+                cursor.execute('ANALYZE')
+                cursor.execute('PRAGMA optimize')
+                cursor.execute(
+                    f'PRAGMA incremental_vacuum({options["vacuum_pages"]})'
+                )
+                cursor.fetchall()
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, log_pages, checkpointed = cursor.fetchone()
+            self.stdout.write(
+                f'{alias}: готово за {perf_counter() - start:.2f} с, '
+                f'WAL: {checkpointed}/{log_pages} страниц, busy={busy}'
+            )
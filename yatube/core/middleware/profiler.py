@@ -0,0 +1,38 @@
+import random
+
+from django.conf import settings
+
+from core.profiler import RequestProfile
+
+
+class SamplingProfilerMiddleware:
+    """Профилирует запросы сотрудников по флагу или случайной выборке.
+
+    Запрос профилируется, если его отправил сотрудник (is_staff) и
+    передан заголовок X-Profile, параметр ?profile или сработала
+    выборка с вероятностью PROFILER_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        with RequestProfile() as profile:
+            response = self.get_response(request)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        profile.save(view_name, request)
+        response['X-Profile-Duration'] = f'{profile.duration * 1000:.2f}ms'
+        return response
+
+    @staticmethod
+    def should_profile(request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_staff:
+            return False
+        if (settings.PROFILER_TRIGGER_HEADER in request.META
+                or settings.PROFILER_TRIGGER_PARAM in request.GET):
+            return True
+        return random.random() < settings.PROFILER_SAMPLE_RATE
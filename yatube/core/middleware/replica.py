@@ -0,0 +1,43 @@
+from time import time
+
+from django.conf import settings
+
+from core import replica
+
+
+class ReplicaMiddleware:
+    """Включает чтение с реплики для GET-запросов к REPLICA_VIEWS.
+
+    Пользователь, который что-то записал, получает cookie и до её
+    истечения читает только из основной базы (read-your-writes).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica.begin_request(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = replica.end_request()
+        if wrote and replica.replica_alias():
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                str(replica.pin_until()),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if request.resolver_match.view_name not in settings.REPLICA_VIEWS:
+            return None
+        try:
+            pinned = float(request.COOKIES[settings.REPLICA_PIN_COOKIE])
+        except (KeyError, ValueError):
+            pinned = 0
+        replica.begin_request(pinned < time() and replica.is_ready())
+        return None
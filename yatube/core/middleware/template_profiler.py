@@ -0,0 +1,34 @@
+from django.conf import settings
+
+from core import template_profiler
+
+
+class TemplateProfilerMiddleware:
+    """Собирает время рендеринга шаблонов в рамках запроса.
+
+    Разбивка сохраняется в request.template_stats, а сотрудникам
+    отдаётся ещё и в заголовке Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not template_profiler.is_installed():
+            return self.get_response(request)
+        template_profiler.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            request.template_stats = template_profiler.finish_request()
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = ', '.join(
+                f'tpl{number};desc="{row["key"]}";dur={row["self_ms"]}'
+                for number, row in enumerate(
+                    request.template_stats[
+                        :settings.TEMPLATE_PROFILING_HEADER_ROWS
+                    ]
+                )
+            )
+        return response
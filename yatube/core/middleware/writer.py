@@ -0,0 +1,29 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.shortcuts import render
+
+from core.writer import WriteTimeout
+
+
+class WriteTimeoutMiddleware:
+    """Отвечает 503, если запись не дождалась очереди писателя.
+
+    Такая запись снята с очереди и не выполнена, поэтому клиенту можно
+    честно предложить повторить запрос.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, WriteTimeout):
+            return None
+        response = render(
+            request, 'core/503.html', status=HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = str(settings.WRITE_QUEUE_RETRY_AFTER)
+        return response
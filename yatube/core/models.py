@@ -0,0 +1,68 @@
+import json
+
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """Событие, записанное в той же транзакции, что и изменение данных."""
+    topic = models.CharField(max_length=100, db_index=True)
+    payload = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(
+            fields=['delivered_at', 'next_attempt_at'],
+            name='outbox_pending_idx'
+        )]
+
+    def __str__(self):
+        return f'{self.topic} #{self.pk}'
+
+    @property
+    def data(self):
+        return json.loads(self.payload)
+
+
+class Task(models.Model):
+    """Фоновая задача очереди core.taskqueue."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Провалена'),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.TextField(default='[]')
+    kwargs = models.TextField(default='{}')
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    unique_key = models.CharField(
+        max_length=200, null=True, blank=True, unique=True
+    )
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(
+            fields=['status', 'run_at'], name='task_ready_idx'
+        )]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,143 @@
+"""Транзакционный outbox и локальная шина событий.
+
+Изменение модели и событие о нём пишутся в одной транзакции
+(OutboxMixin или publish внутри transaction.atomic), а отдельный
+процесс run_outbox раздаёт события обработчикам пачками. Доставка
+«хотя бы один раз»: обработчик может получить событие повторно и
+должен быть идемпотентным. Обработчики регистрируются декоратором
+handler в модулях <app>/handlers.py.
+"""
+import json
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(list)
+
+
+def handler(*topics):
+    """Регистрирует обработчик пачки событий: func(events)."""
+    def register(func):
+        for topic in topics:
+            _handlers[topic].append(func)
+        return func
+    return register
+
+
+def autodiscover():
+    """Импортирует модули handlers всех приложений."""
+    autodiscover_modules('handlers')
+
+
+def publish(topic, payload, using=None):
+    """Пишет событие в outbox базы using в текущей транзакции."""
+    return OutboxEvent.objects.using(
+        using or router.db_for_write(OutboxEvent)
+    ).create(topic=topic, payload=json.dumps(payload))
+
+
+def publish_many(topic, payloads, using=None):
+    """Пишет пачку событий одной темы одним INSERT."""
+    return OutboxEvent.objects.using(
+        using or router.db_for_write(OutboxEvent)
+    ).bulk_create([
+        OutboxEvent(topic=topic, payload=json.dumps(payload))
+        for payload in payloads
+    ])
+
+
+class OutboxMixin:
+    """Публикует <outbox_topic>.created/updated/deleted при save и delete.
+
+    Массовые операции QuerySet (update, delete, bulk_create) событий не
+    публикуют: для них вызывайте publish вручную.
+    """
+    outbox_topic = None
+
+    def outbox_payload(self):
+        return {'id': self.pk}
+
+    def save(self, *args, **kwargs):
+        action = 'created' if self._state.adding else 'updated'
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            publish(
+                f'{self.outbox_topic}.{action}', self.outbox_payload(),
+                using=using
+            )
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        payload = self.outbox_payload()
+        with transaction.atomic(using=using):
+            result = super().delete(using=using, keep_parents=keep_parents)
+            publish(f'{self.outbox_topic}.deleted', payload, using=using)
+        return result
+
+
+def outbox_databases():
+    """Базы, в которых есть таблица outbox."""
+    return [
+        alias for alias in connections
+        if router.allow_migrate_model(alias, OutboxEvent)
+    ]
+
+
+def backoff(attempts):
+    return timedelta(
+        seconds=min(settings.OUTBOX_RETRY_DELAY * 2 ** attempts,
+                    settings.OUTBOX_MAX_RETRY_DELAY)
+    )
+
+
+def dispatch_pending(using, batch_size=None):
+    """Раздаёт пачку готовых событий базы using. Возвращает их число."""
+    now = timezone.now()
+    events = list(OutboxEvent.objects.using(using).filter(
+        delivered_at__isnull=True,
+        next_attempt_at__lte=now,
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    )[:batch_size or settings.OUTBOX_BATCH_SIZE])
+    by_topic = defaultdict(list)
+    for event in events:
+        by_topic[event.topic].append(event)
+    delivered = []
+    for topic, topic_events in by_topic.items():
+        try:
+            for func in _handlers.get(topic, []):
+                func(topic_events)
+        except Exception as exc:
+            logger.exception('Обработчик события %s упал', topic)
+            for event in topic_events:
+                event.attempts += 1
+                event.next_attempt_at = now + backoff(event.attempts)
+                event.last_error = repr(exc)
+            OutboxEvent.objects.using(using).bulk_update(
+                topic_events, ['attempts', 'next_attempt_at', 'last_error']
+            )
+        else:
+            delivered.extend(event.pk for event in topic_events)
+    OutboxEvent.objects.using(using).filter(pk__in=delivered).update(
+        delivered_at=now
+    )
+    return len(events)
+
+
+def purge_delivered(using):
+    """Удаляет доставленные события старше OUTBOX_RETENTION секунд."""
+    border = timezone.now() - timedelta(seconds=settings.OUTBOX_RETENTION)
+    return OutboxEvent.objects.using(using).filter(
+        delivered_at__lt=border
+    ).delete()[0]
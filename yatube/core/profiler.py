@@ -0,0 +1,114 @@
+"""Профилирование запросов в продакшене: cProfile и сэмплер стеков."""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+
+class StackSampler(threading.Thread):
+    """Статистический сэмплер: периодически снимает стек одного потока."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = frame.f_globals.get('__name__', '?')
+                stack.append(f'{module}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        """Стеки в формате collapsed для flamegraph.pl и speedscope."""
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+
+class RequestProfile:
+    """Запуск запроса под cProfile и сэмплером одновременно."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(
+            threading.get_ident(), settings.PROFILER_SAMPLE_INTERVAL
+        )
+        self.started = None
+        self.duration = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+
+    def save(self, view_name, request):
+        """Сохраняет дамп cProfile, collapsed-стеки и описание снимка."""
+        folder = os.path.join(
+            settings.PROFILER_DIR, view_name.replace(':', '.')
+        )
+        os.makedirs(folder, exist_ok=True)
+        stem = os.path.join(folder, f'{time.time():.6f}')
+        self.profile.dump_stats(f'{stem}.prof')
+        with open(f'{stem}.collapsed', 'w') as collapsed:
+            collapsed.write(self.sampler.collapsed())
+        meta = {
+            'view': view_name,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': request.user.get_username(),
+            'duration_ms': round(self.duration * 1000, 2),
+            'samples': sum(self.sampler.stacks.values()),
+            'created': time.time(),
+            'templates': getattr(request, 'template_stats', []),
+        }
+        with open(f'{stem}.json', 'w') as meta_file:
+            json.dump(meta, meta_file)
+        return meta
+
+
+def recent_captures(limit=None):
+    """Последние снимки профиля, от новых к старым."""
+    captures = []
+    root = settings.PROFILER_DIR
+    if not os.path.isdir(root):
+        return captures
+    for folder in os.listdir(root):
+        folder_path = os.path.join(root, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in os.listdir(folder_path):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(folder_path, name)) as meta_file:
+                meta = json.load(meta_file)
+            stem = f'{folder}/{name[:-len(".json")]}'
+            meta['prof'] = f'{stem}.prof'
+            meta['collapsed'] = f'{stem}.collapsed'
+            captures.append(meta)
+    captures.sort(key=lambda meta: meta['created'], reverse=True)
+    return captures[:limit or settings.PROFILER_MAX_CAPTURES]
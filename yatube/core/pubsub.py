@@ -0,0 +1,93 @@
+"""Подписка на события outbox внутри процесса для долгих соединений.
+
+OutboxHub — одна на процесс задача asyncio, которая раз в
+SSE_POLL_INTERVAL секунд читает новые события темы по возрастанию id и
+раздаёт их в очереди подписчиков по ключу (например, id поста). Сколько
+бы ни было слушателей, в базу идёт один запрос за интервал, а
+простаивающий слушатель — это только очередь и ждущая корутина.
+
+Запросы к базе выполняются в отдельном потоке: ORM синхронный.
+"""
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import OutboxEvent
+
+
+class OutboxHub:
+    """Раздача событий topic подписчикам по ключу.
+
+    key(event) — ключ подписки события, load(events) — сообщения для
+    событий пачки {event.pk: message}; вызывается в потоке, один раз на
+    пачку, а не на каждого слушателя.
+    """
+
+    def __init__(self, topic, key, load, using='default'):
+        self.topic = topic
+        self.key = key
+        self.load = load
+        self.using = using
+        self.subscribers = defaultdict(set)
+        self.last_id = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f'hub-{topic}'
+        )
+
+    def subscribe(self, key):
+        queue = asyncio.Queue()
+        self.subscribers[key].add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, key, queue):
+        queues = self.subscribers.get(key)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[key]
+
+    async def run_sync(self, func, *args):
+        """Выполняет синхронный код с ORM в потоке хаба."""
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    async def _run(self):
+        while self.subscribers:
+            messages = await self.run_sync(self._fetch)
+            for key, message in messages:
+                for queue in self.subscribers.get(key, ()):
+                    queue.put_nowait(message)
+            await asyncio.sleep(settings.SSE_POLL_INTERVAL)
+        # Без слушателей хаб засыпает и при следующей подписке начнёт
+        # с событий, появившихся после неё.
+        self.last_id = None
+
+    def _fetch(self):
+        close_old_connections()
+        events = OutboxEvent.objects.using(self.using).filter(
+            topic=self.topic
+        )
+        if self.last_id is None:
+            self.last_id = events.order_by('-pk').values_list(
+                'pk', flat=True
+            ).first() or 0
+            return []
+        events = list(events.filter(pk__gt=self.last_id).order_by('pk')[
+            :settings.OUTBOX_BATCH_SIZE
+        ])
+        if not events:
+            return []
+        self.last_id = events[-1].pk
+        loaded = self.load(events)
+        return [
+            (self.key(event), loaded[event.pk])
+            for event in events if event.pk in loaded
+        ]
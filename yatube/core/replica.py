@@ -0,0 +1,83 @@
+"""Реплика для чтения: снимок основной базы через online backup API SQLite.
+
+Снимок пишется во временный файл и атомарно подменяет файл реплики,
+поэтому читатели видят либо старую, либо новую копию целиком.
+"""
+import os
+import sqlite3
+import threading
+from time import perf_counter, time
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def replica_alias():
+    """Алиас реплики или None, если она не настроена."""
+    alias = settings.REPLICA_DATABASE
+    return alias if alias in settings.DATABASES else None
+
+
+def database_path(alias):
+    name = settings.DATABASES[alias]['NAME']
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    return name
+
+
+def is_ready():
+    """Настроена ли реплика и есть ли уже её снимок."""
+    alias = replica_alias()
+    return alias is not None and os.path.exists(database_path(alias))
+
+
+def snapshot(primary=None, replica=None):
+    """Копирует основную базу в файл реплики и возвращает время, с."""
+    start = perf_counter()
+    copy_database(
+        database_path(primary or settings.REPLICA_PRIMARY_DATABASE),
+        database_path(replica or replica_alias())
+    )
+    return perf_counter() - start
+
+
+def copy_database(source_path, target_path):
+    """Согласованная копия базы SQLite с атомарной подменой файла."""
+    temp_path = f'{target_path}.tmp'
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(temp_path)
+    try:
+        source.backup(target, pages=settings.REPLICA_BACKUP_PAGES)
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+        source.close()
+    os.replace(temp_path, target_path)
+
+
+def begin_request(use_replica):
+    _state.use_replica = use_replica
+    _state.wrote = False
+
+
+def end_request():
+    """Сбрасывает состояние и сообщает, была ли запись в запросе."""
+    wrote = getattr(_state, 'wrote', False)
+    _state.use_replica = False
+    _state.wrote = False
+    return wrote
+
+
+def use_replica():
+    return getattr(_state, 'use_replica', False) and not getattr(
+        _state, 'wrote', False
+    )
+
+
+def mark_write():
+    _state.wrote = True
+
+
+def pin_until():
+    return time() + settings.REPLICA_PIN_SECONDS
@@ -0,0 +1,27 @@
+from core import replica
+
+
+class ReplicaRouter:
+    """Отправляет чтения GET-страниц на реплику, а записи на основную базу.
+
+    После записи чтения в том же запросе идут в основную базу, а
+    ReplicaMiddleware закрепляет пользователя за ней на
+    REPLICA_PIN_SECONDS, чтобы он сразу видел свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica.use_replica():
+            return replica.replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        replica.mark_write()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica.replica_alias():
+            return False
+        return None
@@ -0,0 +1,200 @@
+"""Очередь фоновых задач в базе данных, без внешнего брокера.
+
+Задача объявляется декоратором task в модуле <app>/tasks.py и ставится
+в очередь вызовом .delay() или .schedule(). Команда runworker забирает
+задачи пулом потоков: по приоритету, с отложенным запуском, повторами
+с экспоненциальной задержкой и таймаутом видимости, после которого
+задачу упавшего воркера берёт другой. Пока задача выполняется, воркер
+продлевает её блокировку, так что долгую задачу второй раз не возьмут.
+При TASKS_EAGER задачи выполняются сразу, в вызывающем потоке.
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+# Последний поставленный интервал периодических задач: {имя: номер}.
+_scheduled_slots = {}
+
+
+class TaskFunction:
+    """Обёртка функции-задачи с методами постановки в очередь."""
+
+    def __init__(self, func, priority, max_attempts):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.schedule(args=args, kwargs=kwargs)
+
+    def schedule(self, args=(), kwargs=None, run_at=None, countdown=None,
+                 priority=None, unique_key=None):
+        """Ставит задачу в очередь. С unique_key — не более одной."""
+        kwargs = kwargs or {}
+        if settings.TASKS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        if countdown is not None:
+            run_at = timezone.now() + timedelta(seconds=countdown)
+        fields = {
+            'name': self.name,
+            'args': json.dumps(list(args)),
+            'kwargs': json.dumps(kwargs),
+            'priority': self.priority if priority is None else priority,
+            'run_at': run_at or timezone.now(),
+            'max_attempts': self.max_attempts,
+            'unique_key': unique_key,
+        }
+        if unique_key is None:
+            return Task.objects.create(**fields)
+        try:
+            with transaction.atomic():
+                return Task.objects.create(**fields)
+        except IntegrityError:
+            return None
+
+
+def task(func=None, *, priority=0, max_attempts=None):
+    """Объявляет функцию задачей очереди."""
+    def register(func):
+        task_function = TaskFunction(
+            func, priority, max_attempts or settings.TASKS_MAX_ATTEMPTS
+        )
+        _registry[task_function.name] = task_function
+        return task_function
+    return register(func) if func is not None else register
+
+
+def autodiscover():
+    """Импортирует модули tasks всех приложений."""
+    autodiscover_modules('tasks')
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def backoff(attempts):
+    return timedelta(
+        seconds=min(settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1),
+                    settings.TASKS_MAX_RETRY_DELAY)
+    )
+
+
+def claim(worker, limit):
+    """Забирает до limit готовых задач и продлевает их блокировку.
+
+    Готовы задачи из очереди, чьё время пришло, и выполняющиеся, чей
+    таймаут видимости истёк. Брошенная задача без оставшихся попыток
+    проваливается. Захват — условный UPDATE по одной строке, поэтому
+    задачу получает только один воркер.
+    """
+    now = timezone.now()
+    expired = Q(status=Task.RUNNING, locked_until__lt=now)
+    Task.objects.filter(
+        expired, attempts__gte=F('max_attempts')
+    ).update(
+        status=Task.FAILED, finished_at=now, locked_until=None,
+        last_error='Истёк таймаут видимости.'
+    )
+    ready = Task.objects.filter(
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | expired & Q(attempts__lt=F('max_attempts'))
+    )
+    candidates = ready.order_by('-priority', 'run_at', 'id').values_list(
+        'pk', flat=True
+    )[:limit * 2]
+    locked_until = now + timedelta(seconds=settings.TASKS_VISIBILITY_TIMEOUT)
+    claimed = []
+    for pk in candidates:
+        updated = ready.filter(pk=pk).update(
+            status=Task.RUNNING,
+            locked_until=locked_until,
+            locked_by=worker,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return list(Task.objects.filter(pk__in=claimed).order_by(
+        '-priority', 'run_at', 'id'
+    ))
+
+
+def renew(worker, pks):
+    """Продлевает блокировку выполняющихся у воркера задач."""
+    return Task.objects.filter(
+        pk__in=pks, status=Task.RUNNING, locked_by=worker
+    ).update(locked_until=timezone.now() + timedelta(
+        seconds=settings.TASKS_VISIBILITY_TIMEOUT
+    ))
+
+
+def execute(task_row):
+    """Выполняет захваченную задачу и записывает результат."""
+    started = time.perf_counter()
+    try:
+        get_task(task_row.name)(
+            *json.loads(task_row.args), **json.loads(task_row.kwargs)
+        )
+    except Exception as exc:
+        logger.exception('Задача %s упала', task_row)
+        if task_row.attempts < task_row.max_attempts:
+            fields = {
+                'status': Task.QUEUED,
+                'run_at': timezone.now() + backoff(task_row.attempts),
+            }
+        else:
+            fields = {'status': Task.FAILED, 'finished_at': timezone.now()}
+        fields['last_error'] = repr(exc)
+    else:
+        fields = {'status': Task.DONE, 'finished_at': timezone.now()}
+    fields['locked_until'] = None
+    # Если задачу уже перехватили, её строку не трогаем.
+    Task.objects.filter(
+        pk=task_row.pk, locked_by=task_row.locked_by,
+        attempts=task_row.attempts
+    ).update(**fields)
+    return fields['status'], time.perf_counter() - started
+
+
+def schedule_periodic(now=None):
+    """Ставит в очередь периодические задачи из TASKS_PERIODIC.
+
+    Ключ задачи содержит номер интервала, поэтому несколько воркеров
+    ставят каждую задачу один раз за интервал. Последний интервал
+    каждой задачи процесс помнит сам и пишет в базу только при смене
+    интервала, а не на каждом шаге опроса.
+    """
+    now = now or time.time()
+    for name, interval in settings.TASKS_PERIODIC.items():
+        slot = int(now // interval)
+        if _scheduled_slots.get(name) == slot:
+            continue
+        get_task(name).schedule(unique_key=f'{name}@{slot}')
+        _scheduled_slots[name] = slot
+
+
+def purge_finished():
+    """Удаляет выполненные задачи старше TASKS_RETENTION секунд."""
+    border = timezone.now() - timedelta(seconds=settings.TASKS_RETENTION)
+    return Task.objects.filter(
+        status=Task.DONE, finished_at__lt=border
+    ).delete()[0]
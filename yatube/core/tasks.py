@@ -0,0 +1,27 @@
+"""Фоновые задачи обслуживания."""
+from django.core.management import call_command
+
+from . import outbox, replica
+from .taskqueue import purge_finished, task
+
+
+@task(priority=-10, max_attempts=1)
+def sqlite_maintenance():
+    """Обслуживание баз, доступных для записи (без реплики)."""
+    call_command(
+        'sqlite_maintenance', databases=outbox.outbox_databases()
+    )
+
+
+@task(max_attempts=1)
+def snapshot_replica():
+    if replica.replica_alias() is not None:
+        replica.snapshot()
+
+
+@task(priority=-10)
+def purge_queues():
+    """Чистит доставленные события outbox и выполненные задачи."""
+    for using in outbox.outbox_databases():
+        outbox.purge_delivered(using)
+    purge_finished()
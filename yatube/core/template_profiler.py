@@ -0,0 +1,152 @@
+"""Замер времени рендеринга шаблонов, include, тегов и фильтров.
+
+Для каждого ключа копится число вызовов, суммарное время (вместе с
+вложенными шаблонами) и собственное время (без вложенных). Ключи:
+``template:<имя>``, ``include:<имя>``, ``tag:<тег>``, ``filter:<фильтры>``.
+"""
+import threading
+from collections import defaultdict
+from time import perf_counter
+
+from django.template.base import FilterExpression, Node, Template, TextNode
+from django.template.base import VariableNode
+from django.template.loader_tags import IncludeNode
+
+_local = threading.local()
+_lock = threading.Lock()
+_aggregate = defaultdict(lambda: [0, 0.0, 0.0])
+_originals = {}
+
+QUOTES = '\'"'
+
+
+def _record(key, elapsed, own):
+    with _lock:
+        row = _aggregate[key]
+        row[0] += 1
+        row[1] += elapsed
+        row[2] += own
+    request_stats = getattr(_local, 'request_stats', None)
+    if request_stats is not None:
+        row = request_stats[key]
+        row[0] += 1
+        row[1] += elapsed
+        row[2] += own
+
+
+def _timed(key, func, *args):
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)
+    start = perf_counter()
+    try:
+        return func(*args)
+    finally:
+        elapsed = perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        _record(key, elapsed, elapsed - children)
+
+
+def _node_key(node):
+    key = getattr(node, '_profile_key', None)
+    if key is None:
+        if isinstance(node, IncludeNode):
+            key = f'include:{node.template.token.strip(QUOTES)}'
+        elif isinstance(node, (TextNode, VariableNode)):
+            key = ''
+        else:
+            token = getattr(node, 'token', None)
+            name = (token.contents.split()[0] if token and token.contents
+                    else type(node).__name__)
+            key = f'tag:{name}'
+        node._profile_key = key
+    return key
+
+
+def _render_template(self, context):
+    return _timed(
+        f'template:{self.name or "<string>"}',
+        _originals['template'], self, context
+    )
+
+
+def _render_node(self, context):
+    key = _node_key(self)
+    if not key:
+        return _originals['node'](self, context)
+    return _timed(key, _originals['node'], self, context)
+
+
+def _resolve_filters(self, context, ignore_failures=False):
+    if not self.filters:
+        return _originals['filter'](self, context, ignore_failures)
+    key = 'filter:' + '|'.join(func.__name__ for func, _ in self.filters)
+    return _timed(
+        key, _originals['filter'], self, context, ignore_failures
+    )
+
+
+def install():
+    """Подменяет методы движка шаблонов Django замеряющими обёртками."""
+    if _originals:
+        return
+    _originals['template'] = Template._render
+    _originals['node'] = Node.render_annotated
+    _originals['filter'] = FilterExpression.resolve
+    Template._render = _render_template
+    Node.render_annotated = _render_node
+    FilterExpression.resolve = _resolve_filters
+
+
+def uninstall():
+    """Возвращает исходные методы движка шаблонов."""
+    if not _originals:
+        return
+    Template._render = _originals.pop('template')
+    Node.render_annotated = _originals.pop('node')
+    FilterExpression.resolve = _originals.pop('filter')
+
+
+def is_installed():
+    return bool(_originals)
+
+
+def start_request():
+    """Начинает сбор статистики для текущего запроса."""
+    _local.request_stats = defaultdict(lambda: [0, 0.0, 0.0])
+
+
+def finish_request():
+    """Завершает сбор и возвращает статистику запроса."""
+    request_stats = getattr(_local, 'request_stats', None)
+    _local.request_stats = None
+    return as_rows(request_stats or {})
+
+
+def aggregate():
+    """Накопленная статистика процесса."""
+    with _lock:
+        return as_rows(_aggregate)
+
+
+def reset():
+    with _lock:
+        _aggregate.clear()
+
+
+def as_rows(stats):
+    """Строки статистики, отсортированные по собственному времени."""
+    rows = [
+        {
+            'key': key,
+            'calls': calls,
+            'cumulative_ms': round(cumulative * 1000, 3),
+            'self_ms': round(own * 1000, 3),
+        }
+        for key, (calls, cumulative, own) in stats.items()
+    ]
+    rows.sort(key=lambda row: row['self_ms'], reverse=True)
+    return rows
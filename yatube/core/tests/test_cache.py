@@ -0,0 +1,72 @@
+"""Тестирование двухуровневого кэша."""
+import os
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from .. import cache as two_tier
+
+
+class TwoTierCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, 'invalidations.log')
+        self.addCleanup(two_tier._stores.pop, self.log_path, None)
+        self.shared = caches['default']
+        self.shared.clear()
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        options = {'SHARED': 'default', 'SYNC_INTERVAL': 0, **options}
+        return two_tier.TwoTierCache(self.log_path, {'OPTIONS': options})
+
+    def test_hot_key_is_served_from_memory(self):
+        """Повторное чтение не обращается к общему кэшу."""
+        self.cache.set('group:test', 'группа')
+        self.shared.set('group:test', 'в обход журнала')
+        self.assertEqual(self.cache.get('group:test'), 'группа')
+
+    def test_returned_value_is_a_copy(self):
+        """Изменение полученного значения не портит кэш в памяти."""
+        self.cache.set('user:test', ['a'])
+        self.cache.get('user:test').append('b')
+        self.assertEqual(self.cache.get('user:test'), ['a'])
+
+    def test_write_in_other_process_invalidates_memory(self):
+        """Запись другого процесса видна после чтения журнала."""
+        self.cache.set('group:test', 'старое')
+        self.cache.get('group:test')
+        other = self.make_cache()
+        self.shared.set('group:test', 'новое')
+        with open(self.log_path, 'a') as log:
+            log.write(self.cache.make_key('group:test') + '\n')
+        self.assertEqual(other.get('group:test'), 'новое')
+        self.assertEqual(self.cache.get('group:test'), 'новое')
+
+    def test_delete_and_clear(self):
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many(['a', 'b']), {})
+
+    def test_log_rotation_drops_memory(self):
+        """После смены журнала память процесса сбрасывается целиком."""
+        cache = self.make_cache(LOG_MAX_BYTES=50)
+        cache.set('group:test', 'старое')
+        self.shared.set('group:test', 'новое')
+        for number in range(10):
+            cache.delete(f'other:{number}')
+        self.assertLess(os.path.getsize(self.log_path), 50)
+        self.assertEqual(cache.get('group:test'), 'новое')
+
+    def test_local_entries_are_bounded(self):
+        """В памяти хранится не больше LOCAL_MAX_ENTRIES ключей."""
+        two_tier._stores.pop(self.log_path)
+        cache = self.make_cache(LOCAL_MAX_ENTRIES=2)
+        for key in 'abc':
+            cache.set(key, key)
+        self.assertEqual(len(cache.store.entries), 2)
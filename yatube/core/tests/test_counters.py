@@ -0,0 +1,127 @@
+"""Тестирование буферизованных счётчиков."""
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import OutboxEvent
+from posts.counters import post_views
+from posts.models import Post, User
+
+from .. import counters
+
+
+@override_settings(COUNTERS_ENABLED=True, COUNTERS_FLUSH_INTERVAL=3600)
+class CounterBufferTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.buffer = counters.CounterBuffer(
+            Post, 'views', topic='post.viewed'
+        )
+
+    def tearDown(self):
+        counters._buffers.remove(self.buffer)
+
+    def views(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'views', flat=True
+        ))
+
+    def test_flush_in_one_update(self):
+        """Приращения копятся в памяти и пишутся одним UPDATE."""
+        for post, times in zip(self.posts, (1, 3, 3)):
+            for _ in range(times):
+                self.buffer.add(post.pk)
+        self.assertEqual(self.views(), [0, 0, 0])
+        self.assertEqual(self.buffer.value(self.posts[1]), 3)
+        with self.assertNumQueries(4):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(self.views(), [1, 3, 3])
+        self.assertEqual(self.buffer.pending(self.posts[1].pk), 0)
+        event = OutboxEvent.objects.filter(topic='post.viewed').get()
+        self.assertEqual(
+            event.data['counts'],
+            {str(self.posts[0].pk): 1, str(self.posts[1].pk): 3,
+             str(self.posts[2].pk): 3}
+        )
+
+    def test_negative_delta_stops_at_zero(self):
+        """Уменьшение нулевого счётчика не ломает пачку."""
+        self.buffer.field = 'likes'
+        self.buffer.add(self.posts[0].pk, -1)
+        self.buffer.add(self.posts[1].pk, 2)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'likes', flat=True
+            )),
+            [0, 2, 0]
+        )
+        self.assertEqual(self.buffer.value(self.posts[0]), 0)
+
+    def test_failed_flush_keeps_increments(self):
+        """Если запись упала, приращения остаются в буфере."""
+        self.buffer.add(self.posts[0].pk, 2)
+        self.buffer.field = 'missing'
+        with self.assertRaises(Exception):
+            self.buffer.flush()
+        self.assertEqual(self.buffer.pending(self.posts[0].pk), 2)
+
+    def test_save_keeps_counter(self):
+        """Сохранение поста не затирает сброшенные просмотры."""
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.buffer.add(post.pk, 5)
+        self.buffer.flush()
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.text, post.views), ('Новый текст', 5))
+
+    def test_post_detail_counts_views(self):
+        """Страница поста учитывает и показывает несброшенные просмотры."""
+        post = self.posts[0]
+        url = reverse('posts:post_detail', args=[post.pk])
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['views'], 2)
+        post_views.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.views, 2)
+
+    def test_flush_all_bypasses_writer(self):
+        """При остановке процесса сброс не ждёт поток-писатель."""
+        self.buffer.add(self.posts[0].pk, 2)
+        with mock.patch.object(counters, 'run_write') as run_write:
+            counters.flush_all()
+        run_write.assert_not_called()
+        self.assertEqual(self.views(), [2, 0, 0])
+
+
+@override_settings(COUNTERS_ENABLED=False)
+class DirectCounterTest(TestCase):
+    """Без буфера приращение сразу пишется в базу без outbox."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def test_add_updates_row(self):
+        with self.assertNumQueries(1):
+            post_views.add(self.post.pk)
+        post_views.add(self.post.pk, -5)
+        post_views.add(self.post.pk, 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+        self.assertEqual(post_views.pending(self.post.pk), 0)
+        self.assertFalse(
+            OutboxEvent.objects.filter(topic='post.viewed').exists()
+        )
@@ -0,0 +1,37 @@
+"""Тестирование быстрого построения URL."""
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, reverse
+
+from ..fast_urls import fast_reverse
+
+
+class FastReverseTest(SimpleTestCase):
+
+    def test_matches_reverse(self):
+        """fast_reverse возвращает то же, что и reverse."""
+        routes = (
+            ('posts:index', ()),
+            ('posts:profile', ('Автор 1',)),
+            ('posts:post_detail', (5,)),
+            ('posts:group_list', ('group-1',)),
+            ('about:author', ()),
+        )
+        for viewname, args in routes:
+            with self.subTest(viewname=viewname):
+                self.assertEqual(
+                    fast_reverse(viewname, *args),
+                    reverse(viewname, args=args)
+                )
+
+    def test_invalid_arguments_raise(self):
+        """Неподходящие аргументы дают ту же ошибку, что и reverse."""
+        with self.assertRaises(NoReverseMatch):
+            fast_reverse('posts:group_list', 'не slug')
+
+    def test_template_tag(self):
+        """Тег fast_url строит URL в шаблоне."""
+        template = Template(
+            "{% load fast_urls %}{% fast_url 'posts:post_detail' 3 %}"
+        )
+        self.assertEqual(template.render(Context()), '/posts/3/')
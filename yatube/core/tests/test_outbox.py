@@ -0,0 +1,113 @@
+"""Тестирование транзакционного outbox."""
+from datetime import timedelta
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Comment, Post, User
+from posts.sharding import follow, unfollow
+
+from .. import outbox
+from ..models import OutboxEvent
+
+
+class OutboxPublishTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+        cls.author = User.objects.create_user(username='author')
+
+    def topics(self):
+        return list(OutboxEvent.objects.values_list('topic', flat=True))
+
+    def test_model_changes_publish_events(self):
+        """Сохранение и удаление поста и комментария пишут события."""
+        post = Post.objects.create(text='Текст', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        post.text = 'Новый текст'
+        post.save()
+        post_id = post.pk
+        post.delete()
+        self.assertEqual(self.topics(), [
+            'post.created', 'comment.created', 'post.updated', 'post.deleted'
+        ])
+        self.assertEqual(
+            OutboxEvent.objects.last().data,
+            {'id': post_id, 'author_id': self.user.pk, 'group_id': None}
+        )
+
+    def test_event_rolls_back_with_change(self):
+        """Событие не переживает откат транзакции с изменением."""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Post.objects.create(text='Текст', author=self.user)
+                raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_follow_publishes_once(self):
+        """Подписка и отписка пишут по одному событию."""
+        follow(self.user.pk, self.author.pk)
+        follow(self.user.pk, self.author.pk)
+        unfollow(self.user.pk, self.author.pk)
+        self.assertEqual(self.topics(), ['follow.created', 'follow.deleted'])
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2)
+class OutboxDispatchTest(TestCase):
+
+    def setUp(self):
+        self.received = []
+        patcher = mock.patch.dict(outbox._handlers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_events_are_delivered_in_batches(self):
+        """Обработчик получает события темы одной пачкой."""
+        outbox.handler('test.topic')(self.received.append)
+        outbox.publish('test.topic', {'n': 1})
+        outbox.publish('test.topic', {'n': 2})
+        outbox.publish('test.other', {'n': 3})
+        self.assertEqual(outbox.dispatch_pending('default'), 3)
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual(
+            [event.data['n'] for event in self.received[0]], [1, 2]
+        )
+        self.assertFalse(
+            OutboxEvent.objects.filter(delivered_at__isnull=True).exists()
+        )
+        self.assertEqual(outbox.dispatch_pending('default'), 0)
+
+    def test_failed_events_are_retried_with_backoff(self):
+        """Упавшая пачка откладывается и после лимита попыток не берётся."""
+        @outbox.handler('test.topic')
+        def fail(events):
+            raise ValueError('недоступно')
+
+        event = outbox.publish('test.topic', {})
+        outbox.dispatch_pending('default')
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNone(event.delivered_at)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+        self.assertIn('недоступно', event.last_error)
+        self.assertEqual(outbox.dispatch_pending('default'), 0)
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        outbox.dispatch_pending('default')
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.dispatch_pending('default'), 0)
+
+    def test_purge_keeps_recent_events(self):
+        """Удаляются только давно доставленные события."""
+        old = outbox.publish('test.topic', {})
+        recent = outbox.publish('test.topic', {})
+        OutboxEvent.objects.filter(pk=old.pk).update(
+            delivered_at=timezone.now() - timedelta(days=2)
+        )
+        OutboxEvent.objects.filter(pk=recent.pk).update(
+            delivered_at=timezone.now()
+        )
+        self.assertEqual(outbox.purge_delivered('default'), 1)
+        self.assertTrue(OutboxEvent.objects.filter(pk=recent.pk).exists())
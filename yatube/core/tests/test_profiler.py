@@ -0,0 +1,55 @@
+"""Тестирование профилировщика запросов."""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+TEMP_PROFILER_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILER_DIR=TEMP_PROFILER_DIR)
+class ProfilerTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём сотрудника и обычного пользователя."""
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        """Удаляет папку со снимками."""
+        shutil.rmtree(TEMP_PROFILER_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def test_staff_request_is_profiled(self):
+        """Запрос сотрудника с флагом сохраняет снимок."""
+        response = self.staff_client.get(
+            reverse('posts:index'), {'profile': ''}
+        )
+        self.assertIn('X-Profile-Duration', response)
+        folder = os.path.join(TEMP_PROFILER_DIR, 'posts.index')
+        suffixes = {os.path.splitext(name)[1] for name in os.listdir(folder)}
+        self.assertEqual(suffixes, {'.prof', '.collapsed', '.json'})
+        response = self.staff_client.get(reverse('profiles'))
+        self.assertEqual(len(response.context['captures']), 1)
+
+    def test_regular_user_is_not_profiled(self):
+        """Флаг обычного пользователя игнорируется."""
+        response = self.user_client.get(
+            reverse('posts:index'), {'profile': ''}
+        )
+        self.assertNotIn('X-Profile-Duration', response)
+        response = self.user_client.get(reverse('profiles'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,73 @@
+"""Тестирование реплики для чтения."""
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+from .. import replica
+from ..routers import ReplicaRouter
+
+
+class CopyDatabaseTest(TestCase):
+
+    def test_snapshot_is_consistent_copy(self):
+        """Снимок содержит данные основной базы и заменяет старый."""
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, 'primary.sqlite3')
+            target_path = os.path.join(directory, 'replica.sqlite3')
+            source = sqlite3.connect(source_path)
+            source.execute('PRAGMA journal_mode = WAL')
+            source.execute('CREATE TABLE post (id INTEGER PRIMARY KEY)')
+            source.execute('INSERT INTO post VALUES (1)')
+            source.commit()
+            replica.copy_database(source_path, target_path)
+            source.execute('INSERT INTO post VALUES (2)')
+            source.commit()
+            replica.copy_database(source_path, target_path)
+            source.close()
+            target = sqlite3.connect(target_path)
+            self.assertEqual(
+                target.execute('SELECT count(*) FROM post').fetchone()[0], 2
+            )
+            self.assertEqual(
+                target.execute('PRAGMA journal_mode').fetchone()[0], 'delete'
+            )
+            target.close()
+
+
+@override_settings(REPLICA_DATABASE='default')
+class ReplicaRoutingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self) -> None:
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.addCleanup(replica.end_request)
+
+    def test_reads_go_to_primary_after_write(self):
+        """После записи чтения в запросе уходят в основную базу."""
+        router = ReplicaRouter()
+        replica.begin_request(True)
+        self.assertEqual(router.db_for_read(User), 'default')
+        router.db_for_write(User)
+        self.assertIsNone(router.db_for_read(User))
+
+    def test_writer_is_pinned_to_primary(self):
+        """Запрос с записью закрепляет пользователя за основной базой."""
+        response = self.authorized_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
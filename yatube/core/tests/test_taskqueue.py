@@ -0,0 +1,120 @@
+"""Тестирование очереди фоновых задач."""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .. import taskqueue
+from ..models import Task
+
+CALLS = []
+
+
+@taskqueue.task
+def remember(value):
+    CALLS.append(value)
+
+
+@taskqueue.task(max_attempts=2)
+def explode():
+    raise ValueError('сбой')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_PERIODIC={})
+class TaskQueueTest(TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_eager_mode_runs_inline(self):
+        """В режиме TASKS_EAGER задача выполняется сразу."""
+        with self.settings(TASKS_EAGER=True):
+            self.assertIsNone(remember.delay('сразу'))
+        self.assertEqual(CALLS, ['сразу'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claim_respects_priority_and_run_at(self):
+        """Берутся наступившие задачи, сначала более приоритетные."""
+        low = remember.delay('low')
+        high = remember.schedule(args=['high'], priority=5)
+        remember.schedule(args=['later'], countdown=60)
+        claimed = taskqueue.claim('w1', 10)
+        self.assertEqual([row.pk for row in claimed], [high.pk, low.pk])
+        self.assertEqual(taskqueue.claim('w2', 10), [])
+
+    def test_expired_lock_is_reclaimed(self):
+        """После таймаута видимости задачу забирает другой воркер."""
+        remember.delay('x')
+        taskqueue.claim('w1', 1)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        [row] = taskqueue.claim('w2', 1)
+        self.assertEqual((row.locked_by, row.attempts), ('w2', 2))
+
+    def test_expired_lock_without_attempts_fails(self):
+        """Брошенная задача без оставшихся попыток проваливается."""
+        explode.delay()
+        taskqueue.claim('w1', 1)
+        Task.objects.update(
+            attempts=2, locked_until=timezone.now() - timedelta(1)
+        )
+        self.assertEqual(taskqueue.claim('w2', 1), [])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_renewed_lock_is_not_reclaimed(self):
+        """Продлённую задачу не перехватывают, а перехваченную не
+        завершает прежний захват.
+        """
+        remember.delay('x')
+        [row] = taskqueue.claim('w1', 1)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(taskqueue.renew('w1', [row.pk]), 1)
+        self.assertEqual(taskqueue.claim('w2', 1), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        taskqueue.claim('w1', 1)
+        taskqueue.execute(row)
+        self.assertEqual(Task.objects.get().status, Task.RUNNING)
+
+    def test_execute_retries_with_backoff_then_fails(self):
+        """Упавшая задача откладывается, а после лимита попыток провалена."""
+        explode.delay()
+        [row] = taskqueue.claim('w1', 1)
+        self.assertEqual(taskqueue.execute(row)[0], Task.QUEUED)
+        row.refresh_from_db()
+        self.assertGreater(row.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        [row] = taskqueue.claim('w1', 1)
+        self.assertEqual(taskqueue.execute(row)[0], Task.FAILED)
+        self.assertIn('сбой', Task.objects.get().last_error)
+
+    def test_periodic_task_is_queued_once_per_interval(self):
+        """Периодическая задача ставится один раз за интервал."""
+        name = remember.name
+        taskqueue._scheduled_slots.clear()
+        with self.settings(TASKS_PERIODIC={name: 60}):
+            taskqueue.schedule_periodic(now=120)
+            with self.assertNumQueries(0):
+                taskqueue.schedule_periodic(now=150)
+            taskqueue.schedule_periodic(now=180)
+            # Другой воркер уже поставил задачу этого интервала.
+            taskqueue._scheduled_slots.clear()
+            taskqueue.schedule_periodic(now=190)
+        self.assertEqual(Task.objects.filter(name=name).count(), 2)
+
+
+@override_settings(TASKS_EAGER=False, TASKS_PERIODIC={})
+class RunWorkerTest(TransactionTestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_runworker_burst(self):
+        """runworker --burst выполняет очередь и выходит."""
+        remember.delay('a')
+        remember.delay('b')
+        call_command('runworker', burst=True, threads=2, stdout=StringIO())
+        self.assertEqual(sorted(CALLS), ['a', 'b'])
+        self.assertEqual(
+            Task.objects.filter(status=Task.DONE).count(), 2
+        )
@@ -0,0 +1,46 @@
+"""Тестирование замера времени рендеринга шаблонов."""
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import template_profiler
+
+
+class TemplateProfilerTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём сотрудника и пост."""
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Тестовый пост', author=cls.staff)
+
+    def setUp(self) -> None:
+        template_profiler.install()
+        template_profiler.reset()
+        self.addCleanup(template_profiler.uninstall)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_request_breakdown(self):
+        """Разбивка запроса содержит шаблоны, include, теги и фильтры."""
+        response = self.staff_client.get(reverse('posts:profile', args=(
+            self.staff.username,
+        )))
+        keys = {row['key'] for row in response.wsgi_request.template_stats}
+        for key in ('template:posts/profile.html',
+                    'include:includes/post.html',
+                    'tag:thumbnail', 'tag:url', 'filter:linebreaksbr'):
+            with self.subTest(key=key):
+                self.assertIn(key, keys)
+        self.assertIn('Server-Timing', response)
+
+    def test_custom_filter_in_aggregate(self):
+        """Пользовательский фильтр addclass попадает в общую статистику."""
+        self.staff_client.get(reverse('posts:post_create'))
+        rows = {row['key']: row for row in template_profiler.aggregate()}
+        self.assertIn('filter:addclass', rows)
+        template_row = rows['template:posts/create_post.html']
+        self.assertGreaterEqual(
+            template_row['cumulative_ms'], template_row['self_ms']
+        )
@@ -0,0 +1,20 @@
+"""Тестирование прогрева шаблонов и резолвера."""
+from django.template import engines
+from django.test import TestCase
+
+from ..warmup import template_names, warm_up
+
+
+class WarmUpTest(TestCase):
+
+    def test_project_templates_are_found(self):
+        """В список прогрева попадают шаблоны проекта и приложений."""
+        names = template_names(engines['django'].engine)
+        for name in ('posts/index.html', 'includes/post.html',
+                     'admin/base.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+
+    def test_warm_up_compiles_templates(self):
+        """Прогрев компилирует шаблоны без ошибок."""
+        self.assertGreater(warm_up(), 0)
@@ -0,0 +1,100 @@
+"""Тестирование очереди записей с одним потоком-писателем."""
+import fcntl
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, User
+
+from .. import replica
+from ..writer import WriteQueue, WriteTimeout, run_write, write_queue
+
+
+@override_settings(WRITE_QUEUE_ENABLED=True)
+class WriteQueueTest(TransactionTestCase):
+
+    def test_concurrent_writes_are_batched(self):
+        """Параллельные записи выполняются и группируются в пачки."""
+        batches_before = write_queue.batches
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            groups = list(executor.map(
+                lambda number: run_write(
+                    Group.objects.create,
+                    title=f'Группа {number}', slug=f'group-{number}'
+                ),
+                range(40)
+            ))
+        self.assertEqual(Group.objects.count(), 40)
+        self.assertEqual(len({group.pk for group in groups}), 40)
+        self.assertLess(write_queue.batches - batches_before, 40)
+
+    def test_failed_write_does_not_break_batch(self):
+        """Ошибка одной записи возвращается только её автору."""
+        user = User.objects.create_user(username='user')
+        author = User.objects.create_user(username='author')
+        run_write(Follow.objects.create, user=user, author=author)
+        with self.assertRaises(IntegrityError):
+            run_write(Follow.objects.create, user=user, author=author)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_queued_write_does_not_pin_request(self):
+        """Запись через очередь сама не уводит чтения запроса с реплики."""
+        replica.begin_request(True)
+        self.addCleanup(replica.end_request)
+        run_write(Group.objects.create, title='Группа', slug='group')
+        self.assertTrue(replica.use_replica())
+
+    def test_follow_and_unfollow_go_through_queue(self):
+        """Подписка и отписка из представлений пишутся одним писателем."""
+        user = User.objects.create_user(username='user')
+        author = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        batches_before = write_queue.batches
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            self.client.get(reverse(name, args=[author.username]))
+        self.assertEqual(write_queue.batches - batches_before, 2)
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(WRITE_QUEUE_TIMEOUT=0.1)
+    def test_timed_out_write_is_cancelled(self):
+        """Не дождавшаяся очереди запись отменяется и не выполняется."""
+        release = threading.Event()
+        blocker = write_queue.submit(release.wait)
+        with self.assertRaises(WriteTimeout):
+            run_write(Group.objects.create, title='Группа', slug='group')
+        release.set()
+        blocker.result()
+        self.assertFalse(Group.objects.exists())
+
+    def test_batches_wait_for_file_lock(self):
+        """Пачка ждёт, пока файл блокировки держит другой процесс."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'writelock')
+            queue = WriteQueue(10, 0, lock_file=path)
+            with open(path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                future = queue.submit(
+                    Group.objects.create, title='Группа', slug='group'
+                )
+                with self.assertRaises(TimeoutError):
+                    future.result(timeout=0.2)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self.assertEqual(future.result(timeout=5).slug, 'group')
+
+    def test_write_timeout_answers_503(self):
+        """Отменённая по таймауту запись даёт 503 с Retry-After."""
+        user = User.objects.create_user(username='user')
+        author = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        with mock.patch('posts.views.run_write', side_effect=WriteTimeout):
+            response = self.client.get(
+                reverse('posts:profile_follow', args=[author.username])
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
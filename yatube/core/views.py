@@ -1,6 +1,14 @@
+import os
 from http import HTTPStatus
 
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
 from django.shortcuts import render
+from django.utils._os import safe_join
+
+from . import template_profiler
+from .profiler import recent_captures
 
 
 def page_not_found(request, exception):
@@ -24,3 +32,38 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=HTTPStatus.FORBIDDEN)
+
+
+@staff_member_required
+def profiles(request):
+    """Список последних снимков профилировщика."""
+    return render(
+        request, 'core/profiles.html', {'captures': recent_captures()}
+    )
+
+
+@staff_member_required
+def template_stats(request):
+    """Накопленное время рендеринга шаблонов в этом процессе."""
+    if request.method == 'POST':
+        template_profiler.reset()
+    return render(request, 'core/template_stats.html', {
+        'enabled': template_profiler.is_installed(),
+        'rows': template_profiler.aggregate(),
+    })
+
+
+@staff_member_required
+def profile_download(request, path):
+    """Отдаёт файл снимка профилировщика."""
+    try:
+        full_path = safe_join(settings.PROFILER_DIR, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return FileResponse(
+        open(full_path, 'rb'),
+        as_attachment=True,
+        filename=os.path.basename(full_path)
+    )
@@ -0,0 +1,59 @@
+"""Прогрев процесса: компиляция шаблонов и заполнение URL-резолвера."""
+import os
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+
+def template_dirs(engine):
+    """Каталоги всех загрузчиков движка, включая обёрнутые кэширующим."""
+    loaders = list(engine.template_loaders)
+    while loaders:
+        loader = loaders.pop(0)
+        loaders.extend(getattr(loader, 'loaders', []))
+        if hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def template_names(engine):
+    """Имена всех шаблонов из каталогов движка."""
+    names = set()
+    for directory in template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                if file_name.endswith(('.html', '.txt')):
+                    path = os.path.join(root, file_name)
+                    names.add(os.path.relpath(path, directory).replace(
+                        os.sep, '/'
+                    ))
+    return sorted(names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны, чтобы они попали в кэширующий загрузчик."""
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in template_names(engine.engine):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                continue
+            compiled += 1
+    return compiled
+
+
+def warm_resolver(resolver=None):
+    """Заполняет словари reverse у резолвера и всех пространств имён."""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    for _, sub_resolver in resolver.namespace_dict.values():
+        warm_resolver(sub_resolver)
+
+
+def warm_up():
+    compiled = warm_templates()
+    warm_resolver()
+    return compiled
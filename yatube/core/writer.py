@@ -0,0 +1,152 @@
+"""Очередь записей в SQLite с одним потоком-писателем.
+
+SQLite допускает только одного писателя, поэтому конкурирующие запросы
+ждут блокировку и получают ``database is locked``. Здесь все записи
+процесса передаются одному потоку, который группирует их в короткие
+транзакции: каждая запись выполняется в своей точке сохранения, а
+запрос получает ответ только после фиксации всей пачки.
+
+Пачки группируются внутри процесса. Между процессами сервера писатели
+чередуются по блокировке файла WRITE_QUEUE_LOCK_FILE (flock, только
+POSIX): пачка ждёт своей очереди на файле, а не опрашивает занятую
+базу до busy timeout. Без fcntl или без файла процессы пишут как раньше.
+"""
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from time import monotonic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+
+class WriteTimeout(Exception):
+    """Запись не дождалась очереди и отменена, в базу она не попала."""
+
+
+@contextmanager
+def process_lock(path):
+    """Исключительная блокировка файла path на время пачки."""
+    if not path or fcntl is None:
+        yield
+        return
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class WriteQueue:
+    """Очередь записей, которые выполняет один поток пачками."""
+
+    def __init__(self, batch_size, batch_wait, lock_file=None):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.lock_file = lock_file
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Ставит запись в очередь и возвращает Future с её результатом."""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def is_writer_thread(self):
+        return threading.current_thread() is self._thread
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='sqlite-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            self._execute(batch)
+
+    def _execute(self, batch):
+        results = []
+        try:
+            with process_lock(self.lock_file), transaction.atomic():
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(*args, **kwargs)))
+                    except Exception as exc:
+                        future.set_exception(exc)
+        except Exception as exc:
+            for future, _ in results:
+                future.set_exception(exc)
+            return
+        finally:
+            self.batches += 1
+        for future, result in results:
+            future.set_result(result)
+
+
+write_queue = WriteQueue(
+    settings.WRITE_QUEUE_BATCH_SIZE, settings.WRITE_QUEUE_BATCH_WAIT,
+    settings.WRITE_QUEUE_LOCK_FILE
+)
+
+
+def run_write(func, *args, **kwargs):
+    """Выполняет запись через поток-писатель и ждёт её фиксации.
+
+    Если очередь выключена, вызов уже идёт из потока-писателя или
+    внутри открытой транзакции, запись выполняется сразу: иначе она не
+    увидела бы незафиксированные данные вызывающего кода.
+
+    Запрос за основной базой не закрепляется: запись идёт в другом
+    потоке, и закрепить запрос (replica.mark_write) после настоящей
+    записи должно представление.
+
+    Если за WRITE_QUEUE_TIMEOUT запись не началась, она снимается с
+    очереди и поднимается WriteTimeout (ответ 503). Начатую запись
+    ждём до конца: она может зафиксироваться, и ответ должен это знать.
+    """
+    if (not settings.WRITE_QUEUE_ENABLED
+            or write_queue.is_writer_thread()
+            or connection.in_atomic_block):
+        return func(*args, **kwargs)
+    future = write_queue.submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+    except TimeoutError:
+        if future.cancel():
+            raise WriteTimeout(
+                f'Запись ждала очереди дольше '
+                f'{settings.WRITE_QUEUE_TIMEOUT} с.'
+            ) from None
+        return future.result()
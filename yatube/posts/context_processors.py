@@ -0,0 +1,27 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import unread
+from .sharding import following_ids
+
+
+def following(request):
+    """Подписки текущего пользователя: {% if author.id in following_ids %}.
+
+    Загружаются из кэша только при первом обращении в шаблоне.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return {'following_ids': ()}
+    return {
+        'following_ids': SimpleLazyObject(lambda: following_ids(user.id))
+    }
+
+
+def unread_posts(request):
+    """Значок новых постов ленты подписок для шапки: '', '3' или '99+'."""
+    user = request.user
+    if not user.is_authenticated:
+        return {'unread_posts': ''}
+    return {'unread_posts': SimpleLazyObject(
+        lambda: unread.label(unread.unread_count(user))
+    )}
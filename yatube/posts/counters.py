@@ -0,0 +1,8 @@
+"""Буферы счётчиков постов и комментариев, см. core.counters."""
+from core.counters import CounterBuffer
+
+from .models import Comment, Post
+
+post_views = CounterBuffer(Post, 'views', topic='post.viewed')
+post_likes = CounterBuffer(Post, 'likes', topic='post.liked')
+comment_likes = CounterBuffer(Comment, 'likes')
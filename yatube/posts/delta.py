@@ -0,0 +1,104 @@
+"""Курсоры ленты: новые посты для опроса и следующие для прокрутки.
+
+Курсор — «unix-время в микросекундах.id» самого нового поста, который
+видел клиент. Отметка самого нового поста на сайте лежит в кэше и
+обновляется при создании поста, поэтому опрос без новостей не ходит в
+базу. Срок FEED_DELTA_LATEST_CACHE_TIME ограничивает отставание, если
+два процесса записали отметки вперемешку.
+
+Новые id берутся из индекса pub_date (в SQLite он содержит и rowid,
+так что запрос не читает таблицу), и целиком загружаются только они.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Post
+
+LATEST_KEY = 'posts:latest'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def make_cursor(pub_date, post_id):
+    micros = (pub_date - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{post_id}'
+
+
+def parse_cursor(cursor):
+    """Курсор в пару (pub_date, id) или None."""
+    try:
+        micros, post_id = map(int, cursor.split('.'))
+        pub_date = EPOCH + timedelta(microseconds=micros)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    return pub_date, post_id
+
+
+def latest():
+    """Пара (pub_date, id) самого нового поста или None."""
+    marker = cache.get(LATEST_KEY)
+    if marker is None:
+        marker = Post.objects.order_by('-pub_date', '-pk').values_list(
+            'pub_date', 'pk'
+        ).first() or ()
+        cache.set(LATEST_KEY, marker, settings.FEED_DELTA_LATEST_CACHE_TIME)
+    return tuple(marker) or None
+
+
+def remember(post):
+    """Сдвигает отметку самого нового поста, если post новее."""
+    marker = latest()
+    if marker is None or (post.pub_date, post.pk) > marker:
+        cache.set(
+            LATEST_KEY, (post.pub_date, post.pk),
+            settings.FEED_DELTA_LATEST_CACHE_TIME
+        )
+
+
+def after(posts, cursor):
+    return posts.filter(pub_date__gte=cursor[0]).exclude(
+        pub_date=cursor[0], pk__lte=cursor[1]
+    )
+
+
+def since(posts, cursor, limit):
+    """Посты из posts новее cursor, от новых к старым, и has_more.
+
+    Берутся limit ближайших к курсору: если новых больше, has_more
+    означает, что следующий опрос с новым курсором вернёт остальные.
+    Без курсора — последние limit постов.
+    """
+    if cursor is None:
+        ids = list(posts.order_by('-pub_date', '-pk').values_list(
+            'pk', flat=True
+        )[:limit])
+        has_more = False
+    else:
+        marker = latest()
+        if marker is None or marker <= cursor:
+            return [], False
+        ids = list(after(posts, cursor).order_by(
+            'pub_date', 'pk'
+        ).values_list('pk', flat=True)[:limit + 1])
+        has_more = len(ids) > limit
+        ids = ids[:limit][::-1]
+    found = Post.objects.select_related('author', 'group').in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found], has_more
+
+
+def before(posts, cursor, limit):
+    """Следующие limit постов ленты старше cursor и курсор после них.
+
+    Ключевая пагинация по (pub_date, id): страница не сдвигается, если
+    тем временем вышли новые посты. Без курсора — начало ленты.
+    """
+    if cursor is not None:
+        posts = posts.filter(pub_date__lte=cursor[0]).exclude(
+            pub_date=cursor[0], pk__gte=cursor[1]
+        )
+    page = list(posts.order_by('-pub_date', '-pk')[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    last = page[limit - 1]
+    return page[:limit], make_cursor(last.pub_date, last.pk)
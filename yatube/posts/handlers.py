@@ -0,0 +1,56 @@
+"""Обработчики событий outbox, см. core.outbox."""
+from core.outbox import handler
+
+from . import recommendations, trending, unread
+from .sharding import followers_of
+
+
+@handler('follow.created', 'follow.deleted')
+def queue_recommendations(events):
+    """Подписки изменились: пересчитать рекомендации пользователей."""
+    recommendations.enqueue(event.data['user_id'] for event in events)
+
+
+@handler('post.created', 'comment.created', 'post.viewed', 'post.liked')
+def score_trending(events):
+    """Посты, комментарии, лайки и просмотры поднимают популярность."""
+    trending.record(
+        trending_event for event in events
+        for trending_event in _trending_events(event)
+    )
+
+
+def _trending_events(event):
+    created = event.created.timestamp()
+    if event.topic == 'post.created':
+        return [(event.data['id'], 'post', created, 1)]
+    if event.topic == 'comment.created':
+        return [(event.data['post_id'], 'comment', created, 1)]
+    kind = 'view' if event.topic == 'post.viewed' else 'like'
+    return [
+        (int(post_id), kind, created, count)
+        for post_id, count in event.data['counts'].items()
+    ]
+
+
+@handler('post.created')
+def count_unread(events):
+    """Новый пост прибавляется к счётчикам непрочитанного подписчиков."""
+    for event in events:
+        unread.bump(
+            follow.user_id for follow in followers_of(event.data['author_id'])
+        )
+
+
+@handler('post.deleted')
+def reset_unread(events):
+    for event in events:
+        unread.invalidate(
+            follow.user_id for follow in followers_of(event.data['author_id'])
+        )
+
+
+@handler('follow.created', 'follow.deleted')
+def reset_unread_on_follow(events):
+    """Лента пользователя изменилась: счётчик посчитается заново."""
+    unread.invalidate({event.data['user_id'] for event in events})
@@ -0,0 +1,66 @@
+"""Лайки постов и комментариев.
+
+Строка лайка уникальна для пары (пользователь, объект) и добавляется
+одним INSERT без проверки, а счётчик на посте или комментарии меняется
+через буфер (posts/counters.py): лайки популярного поста не выстраивают
+записи в очередь на одну строку.
+"""
+from django.db import router
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from core import replica
+from core.db import insert_ignore
+
+from .counters import comment_likes, post_likes
+from .models import CommentLike, PostLike
+
+TARGETS = {
+    'post': (PostLike, 'post', post_likes),
+    'comment': (CommentLike, 'comment', comment_likes),
+}
+
+
+def like(kind, user_id, target_id):
+    """Ставит лайк. True, если его не было."""
+    model, field, counter = TARGETS[kind]
+    replica.mark_write()
+    created = insert_ignore(
+        router.db_for_write(model), model,
+        user=user_id, created=timezone.now(), **{field: target_id}
+    )
+    if created:
+        counter.add(target_id)
+    return created
+
+
+def unlike(kind, user_id, target_id):
+    """Снимает лайк. True, если он был."""
+    model, field, counter = TARGETS[kind]
+    replica.mark_write()
+    deleted, _ = model.objects.filter(
+        user_id=user_id, **{field: target_id}
+    ).delete()
+    if deleted:
+        counter.add(target_id, -1)
+    return bool(deleted)
+
+
+def liked(kind, user, targets):
+    """Id объектов из targets, которые лайкнул пользователь, по порядку.
+
+    targets — объекты, их id или QuerySet (тогда он становится
+    подзапросом). Один запрос на всю страницу, для гостя — ни одного.
+    """
+    if not user.is_authenticated:
+        return []
+    model, field, _ = TARGETS[kind]
+    if isinstance(targets, QuerySet):
+        targets = targets.values('pk')
+    else:
+        targets = [getattr(target, 'pk', target) for target in targets]
+        if not targets:
+            return []
+    return sorted(model.objects.filter(
+        user_id=user.id, **{f'{field}_id__in': targets}
+    ).values_list(f'{field}_id', flat=True))
@@ -0,0 +1,84 @@
+"""Кэшированный поиск групп по slug и пользователей по username.
+
+Эти строки почти не меняются, а ищутся на каждом запросе. Найденный
+объект кэшируется под ключом <prefix>:<значение>, отсутствие — тоже,
+на меньшее время, чтобы перебор несуществующих имён не нагружал базу.
+Отсутствия лежат в отдельном кэше LOOKUP_MISSES_CACHE: перебор имён
+ботами не вытесняет из основного кэша горячих авторов и группы.
+Кэш сбрасывается при сохранении и удалении, в том числе по старому
+значению поля, если его переименовали.
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db.models.signals import post_delete, post_init, post_save
+from django.http import Http404
+
+from .models import Group, User
+
+NOT_FOUND = 'not-found'
+
+
+class CachedLookup:
+
+    def __init__(self, model, field, prefix):
+        self.model = model
+        self.field = field
+        self.prefix = prefix
+        self.original_attr = f'_cached_lookup_{field}'
+
+    def key(self, value):
+        return f'{self.prefix}:{value}'
+
+    def get(self, value):
+        """Объект или None, если его нет."""
+        key = self.key(value)
+        instance = cache.get(key)
+        if instance is not None:
+            return instance
+        misses = caches[settings.LOOKUP_MISSES_CACHE]
+        if misses.get(key) == NOT_FOUND:
+            return None
+        instance = self.model.objects.filter(**{self.field: value}).first()
+        if instance is None:
+            misses.set(key, NOT_FOUND, settings.LOOKUP_NEGATIVE_CACHE_TIME)
+            return None
+        # Объект мог прийти с реплики. Без отметки базы связанные запросы
+        # (author.posts, group.group_posts) выбирает роутер, иначе они
+        # ушли бы на реплику и у закреплённого за основной базой.
+        instance._state.db = None
+        cache.set(key, instance, settings.LOOKUP_CACHE_TIME)
+        return instance
+
+    def get_or_404(self, value):
+        instance = self.get(value)
+        if instance is None:
+            raise Http404(
+                f'{self.model._meta.object_name} {value!r} не найден.'
+            )
+        return instance
+
+    def invalidate(self, *values):
+        keys = [self.key(value) for value in set(values)]
+        cache.delete_many(keys)
+        caches[settings.LOOKUP_MISSES_CACHE].delete_many(keys)
+
+    def connect(self):
+        """Подключает сброс кэша к сигналам модели."""
+        post_init.connect(self._remember, sender=self.model, weak=False)
+        post_save.connect(self._changed, sender=self.model, weak=False)
+        post_delete.connect(self._changed, sender=self.model, weak=False)
+
+    def _remember(self, sender, instance, **kwargs):
+        instance.__dict__[self.original_attr] = instance.__dict__.get(
+            self.field
+        )
+
+    def _changed(self, sender, instance, **kwargs):
+        value = getattr(instance, self.field)
+        original = instance.__dict__.get(self.original_attr) or value
+        self.invalidate(value, original)
+        instance.__dict__[self.original_attr] = value
+
+
+group_by_slug = CachedLookup(Group, 'slug', 'group')
+user_by_username = CachedLookup(User, 'username', 'user')
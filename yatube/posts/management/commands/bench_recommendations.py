@@ -0,0 +1,51 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет расчёт рекомендаций на синтетическом графе подписок '
+        'со степенным распределением популярности авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edges', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--authors', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not recommendations.is_available():
+            raise CommandError('Для расчёта нужны numpy и scipy.')
+        np = recommendations.np
+        rng = np.random.default_rng(options['seed'])
+        users = rng.integers(0, options['users'], options['edges'])
+        popularity = 1 / np.arange(1, options['authors'] + 1) ** 0.8
+        authors = options['users'] + rng.choice(
+            options['authors'], options['edges'],
+            p=popularity / popularity.sum()
+        )
+        edges = np.unique(np.column_stack([users, authors]), axis=0)
+        self.stdout.write(f'Подписок без повторов: {len(edges)}')
+
+        timings = {}
+        started = perf_counter()
+        result = recommendations.compute(edges, timings=timings)
+        total = perf_counter() - started
+        for stage, seconds in timings.items():
+            self.stdout.write(f'{stage}: {seconds:.3f} с')
+        self.stdout.write(
+            f'Всего {total:.3f} с, рекомендации для {len(result)} '
+            f'пользователей'
+        )
+
+        sample = list(result)[:1000]
+        started = perf_counter()
+        recommendations.compute(edges, user_ids=sample)
+        self.stdout.write(
+            f'Инкрементально для {len(sample)} пользователей: '
+            f'{perf_counter() - started:.3f} с'
+        )
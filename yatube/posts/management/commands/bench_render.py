@@ -0,0 +1,55 @@
+from timeit import timeit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.template import engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+
+TEMPLATES = ('posts/group_list.html', 'posts/follow.html')
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость рендеринга ленты в Django-шаблонах и Jinja2.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if 'jinja2' not in engines:
+            raise CommandError('Jinja2 не установлен: pip install Jinja2')
+        group = Group(title='Группа', slug='group', description='Описание')
+        posts = [
+            Post(
+                id=number,
+                text='Текст поста\nвторая строка',
+                pub_date=timezone.now(),
+                author=User(username=f'author_{number}'),
+                group=group,
+            )
+            for number in range(1, settings.QTY_POSTS * 3 + 1)
+        ]
+        page_obj = Paginator(posts, settings.QTY_POSTS).get_page(2)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = None
+        number = options['number']
+        for template_name in TEMPLATES:
+            results = {}
+            for engine in ('django', 'jinja2'):
+                template = engines[engine].get_template(template_name)
+                results[engine] = number / timeit(
+                    lambda: template.render(
+                        {'page_obj': page_obj, 'group': group}, request
+                    ),
+                    number=number
+                )
+            self.stdout.write(
+                f'{template_name}: django {results["django"]:.0f} стр/с, '
+                f'jinja2 {results["jinja2"]:.0f} стр/с, '
+                f'ускорение {results["jinja2"] / results["django"]:.1f}x'
+            )
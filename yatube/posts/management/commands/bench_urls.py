@@ -0,0 +1,62 @@
+from timeit import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+
+from posts.models import Group, Post, User
+
+STOCK_TEMPLATE = """
+{% for post in page_obj %}
+  <a href="{% url 'posts:profile' post.author.username %}"></a>
+  <a href="{% url 'posts:post_detail' post.id %}"></a>
+  {% if post.group %}
+    <a href="{% url 'posts:group_list' post.group.slug %}"></a>
+  {% endif %}
+{% endfor %}
+"""
+
+FAST_TEMPLATE = """
+{% for post in page_obj %}
+  <a href="{{ post.get_author_url }}"></a>
+  <a href="{{ post.get_absolute_url }}"></a>
+  {% if post.group %}
+    <a href="{{ post.group.get_absolute_url }}"></a>
+  {% endif %}
+{% endfor %}
+"""
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает {% url %} и быстрые URL на странице ленты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        page_obj = [
+            Post(
+                id=number,
+                text='text',
+                author=User(username=f'author_{number}'),
+                group=Group(slug=f'group_{number}'),
+            )
+            for number in range(1, settings.QTY_POSTS + 1)
+        ]
+        engine = Engine.get_default()
+        context = Context({'page_obj': page_obj})
+        number = options['number']
+        results = {}
+        for title, source in (('{% url %}', STOCK_TEMPLATE),
+                              ('fast_reverse', FAST_TEMPLATE)):
+            template = engine.from_string(source)
+            results[title] = timeit(
+                lambda: template.render(context), number=number
+            ) / number * 1000
+            self.stdout.write(
+                f'{title}: {results[title]:.3f} мс на страницу '
+                f'из {settings.QTY_POSTS} постов'
+            )
+        self.stdout.write(
+            f'Ускорение: {results["{% url %}"] / results["fast_reverse"]:.1f}x'
+        )
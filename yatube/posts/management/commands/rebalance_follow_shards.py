@@ -0,0 +1,150 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Follow
+from posts.sharding import hash_shard, set_placement, shard_for_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит подписки пользователей между шардами без остановки. '
+        'Перед изменением FOLLOW_SHARDS запустите с --pin-current, после '
+        '— с --rebalance.'
+    )
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group(required=True)
+        action.add_argument(
+            '--pin-current', action='store_true',
+            help='Закрепить пользователей за их текущими шардами.'
+        )
+        action.add_argument(
+            '--rebalance', action='store_true',
+            help='Перенести закреплённых пользователей в шард по хешу.'
+        )
+        action.add_argument(
+            '--user', type=int, help='Перенести одного пользователя.'
+        )
+        parser.add_argument('--to', help='Шард для --user.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--grace', type=float,
+            default=settings.FOLLOW_SHARD_MAP_CACHE_TIME,
+            help='Пауза, за которую истекают закэшированные размещения.'
+        )
+
+    def handle(self, *args, **options):
+        if options['pin_current']:
+            return self.pin_current()
+        if options['user']:
+            if options['to'] not in settings.FOLLOW_SHARDS:
+                raise CommandError('Укажите --to из FOLLOW_SHARDS.')
+            return self.move({options['user']: options['to']}, options)
+        moves = {}
+        for user_id in self.users_with_follows():
+            target = hash_shard(user_id)
+            if shard_for_user(user_id) != target:
+                moves[user_id] = target
+            else:
+                set_placement(user_id, target)
+            if len(moves) >= options['batch_size']:
+                self.move(moves, options)
+                moves = {}
+        if moves:
+            self.move(moves, options)
+
+    def users_with_follows(self):
+        user_ids = set()
+        for shard in settings.FOLLOW_SHARDS:
+            user_ids.update(Follow.objects.using(shard).values_list(
+                'user_id', flat=True
+            ).distinct())
+        return sorted(user_ids)
+
+    def pin_current(self):
+        for shard in settings.FOLLOW_SHARDS:
+            user_ids = Follow.objects.using(shard).values_list(
+                'user_id', flat=True
+            ).distinct()
+            for user_id in user_ids:
+                set_placement(user_id, shard, pin=True)
+        self.stdout.write('Пользователи закреплены за текущими шардами.')
+
+    def move(self, moves, options):
+        """Двойная запись, копирование, переключение чтения, очистка."""
+        sources = {user_id: shard_for_user(user_id) for user_id in moves}
+        moves = {
+            user_id: target for user_id, target in moves.items()
+            if sources[user_id] != target
+        }
+        for user_id, target in moves.items():
+            set_placement(user_id, sources[user_id], moving_to=target)
+        time.sleep(options['grace'])
+        for user_id, target in moves.items():
+            self.copy(user_id, sources[user_id], target)
+            self.drop_resurrected(user_id, sources[user_id], target)
+            set_placement(user_id, target)
+        # Пока кэш размещений не истёк, процессы пишут в оба шарда, так
+        # что приёмник уже полон. Повторное копирование вернуло бы
+        # подписки, удалённые в приёмнике за эту паузу.
+        time.sleep(options['grace'])
+        for user_id, target in moves.items():
+            Follow.objects.using(sources[user_id]).filter(
+                user_id=user_id
+            ).delete()
+            self.stdout.write(
+                f'Пользователь {user_id}: {sources[user_id]} -> {target}'
+            )
+
+    @staticmethod
+    def authors(shard, user_id):
+        """{author_id: id строки} подписок пользователя в шарде."""
+        return dict(Follow.objects.using(shard).filter(
+            user_id=user_id
+        ).values_list('author_id', 'id'))
+
+    def copy(self, user_id, source, target):
+        """Копирует подписки с их id, чтобы курсоры follows_page не
+        сбились. Id, занятый в приёмнике чужой строкой, выдаётся заново.
+        """
+        rows = self.authors(source, user_id)
+        missing = {
+            author_id: follow_id for author_id, follow_id in rows.items()
+            if author_id not in self.authors(target, user_id)
+        }
+        taken = set(Follow.objects.using(target).filter(
+            pk__in=missing.values()
+        ).values_list('pk', flat=True))
+        Follow.objects.using(target).bulk_create([
+            Follow(
+                id=None if follow_id in taken else follow_id,
+                user_id=user_id, author_id=author_id
+            )
+            for author_id, follow_id in missing.items()
+        ], ignore_conflicts=True)
+        # Конфликт по id с параллельной вставкой молча пропускает строку.
+        lost = set(rows) - set(self.authors(target, user_id))
+        Follow.objects.using(target).bulk_create([
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in lost
+        ], ignore_conflicts=True)
+
+    def drop_resurrected(self, user_id, source, target):
+        """Удаляет из приёмника подписки, которых уже нет в источнике.
+
+        Отписка между чтением источника и вставкой в приёмник удалила
+        строку в обоих шардах до копирования, и копия её воскресила.
+        Приёмник читается первым: подписка, записанная в оба шарда
+        позже, не попадёт в кандидаты, а повторная сверка с источником
+        отсеивает ещё не дописанные в него.
+        """
+        candidates = set(self.authors(target, user_id)) - set(
+            self.authors(source, user_id)
+        )
+        dead = candidates - set(self.authors(source, user_id))
+        if dead:
+            Follow.objects.using(target).filter(
+                user_id=user_id, author_id__in=dead
+            ).delete()
@@ -0,0 +1,17 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает оценки ленты популярного по всем событиям.'
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        posts = trending.rebuild()
+        self.stdout.write(
+            f'Оценки пересчитаны для {posts} постов '
+            f'за {perf_counter() - started:.3f} с'
+        )
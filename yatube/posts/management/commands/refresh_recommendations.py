@@ -0,0 +1,31 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации авторов: пользователям, чьи подписки '
+        'изменились, или всем с --full.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать рекомендации всех пользователей.'
+        )
+
+    def handle(self, *args, **options):
+        if not recommendations.is_available():
+            raise CommandError('Для расчёта нужны numpy и scipy.')
+        timings = {}
+        started = perf_counter()
+        users = recommendations.refresh(options['full'], timings)
+        for stage, seconds in timings.items():
+            self.stdout.write(f'{stage}: {seconds:.3f} с')
+        self.stdout.write(
+            f'Рекомендации пересчитаны для {users} пользователей '
+            f'за {perf_counter() - started:.3f} с'
+        )
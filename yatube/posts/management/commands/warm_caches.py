@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import warming
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш: первые страницы главной, групп и популярных '
+        'профилей, а также миниатюры их постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARM_CACHES_PAGES
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=settings.WARM_CACHES_PROFILES,
+            help='Сколько профилей с наибольшим числом постов прогреть.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.WARM_CACHES_THREADS
+        )
+        parser.add_argument(
+            '--base-url', default=settings.WARM_CACHES_BASE_URL,
+            help='Запрашивать страницы у сервера, например '
+                 'http://127.0.0.1:8000, вместо рендеринга в процессе.'
+        )
+
+    def handle(self, *args, **options):
+        self.done = 0
+        duration = warming.warm(
+            options['pages'], options['profiles'], options['threads'],
+            options['base_url'], progress=self.progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето {self.done} объектов за {duration:.2f} с'
+        ))
+
+    def progress(self, kind, name, result, seconds):
+        self.done += 1
+        self.stdout.write(
+            f'[{self.done}] {kind} {name}: {result} за {seconds * 1000:.1f} мс'
+        )
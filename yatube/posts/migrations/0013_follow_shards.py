@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0012_auto_20220809_2316'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowShardMap',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follow_shard', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('shard', models.CharField(max_length=64)),
+                ('moving_to', models.CharField(blank=True, max_length=64)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='posts.Post')),
+                ('score', models.FloatField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0017_likes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_watermark', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pub_date', models.DateTimeField()),
+                ('post_id', models.IntegerField()),
+            ],
+        ),
+    ]
@@ -2,6 +2,10 @@ from django.conf import settings
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from core.counters import CounterFieldsMixin
+from core.fast_urls import fast_reverse
+from core.outbox import OutboxMixin
+
 User = get_user_model()
 
 
@@ -13,8 +17,11 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return fast_reverse('posts:group_list', self.slug)
+
 
-class Post(models.Model):
+class Post(CounterFieldsMixin, OutboxMixin, models.Model):
     text = models.TextField(verbose_name='Текст поста')
     pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
     author = models.ForeignKey(
@@ -35,6 +42,11 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    likes = models.PositiveIntegerField('Лайки', default=0)
+
+    # Меняются только буферами из posts/counters.py.
+    counter_fields = ('views', 'likes')
 
     class Meta:
         ordering = ['-pub_date']
@@ -44,8 +56,28 @@ class Post(models.Model):
     def __str__(self):
         return str(self.text[:settings.FIRST_CHARS_POST])
 
+    def get_absolute_url(self):
+        return fast_reverse('posts:post_detail', self.pk)
+
+    outbox_topic = 'post'
+
+    def like_count(self):
+        from .counters import post_likes
+
+        return post_likes.value(self)
+
+    def get_author_url(self):
+        return fast_reverse('posts:profile', self.author.username)
+
+    def outbox_payload(self):
+        return {
+            'id': self.pk,
+            'author_id': self.author_id,
+            'group_id': self.group_id,
+        }
+
 
-class Comment(models.Model):
+class Comment(CounterFieldsMixin, OutboxMixin, models.Model):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE,
         blank=True,
@@ -59,24 +91,150 @@ class Comment(models.Model):
         verbose_name='Автор')
     text = models.TextField(verbose_name='Текст комментария')
     created = models.DateTimeField(auto_now_add=True)
+    likes = models.PositiveIntegerField('Лайки', default=0)
+
+    counter_fields = ('likes',)
+    outbox_topic = 'comment'
+
+    def like_count(self):
+        from .counters import comment_likes
+
+        return comment_likes.value(self)
+
+    def outbox_payload(self):
+        return {
+            'id': self.pk,
+            'post_id': self.post_id,
+            'author_id': self.author_id,
+        }
+
+
+class PostLike(models.Model):
+    """Лайк поста. Ставить и снимать через posts.likes."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='post_likes'
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='like_set'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'], name='unique_post_like')]
+
+
+class CommentLike(models.Model):
+    """Лайк комментария. Ставить и снимать через posts.likes."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='comment_likes'
+    )
+    comment = models.ForeignKey(
+        Comment, on_delete=models.CASCADE, related_name='like_set'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'comment'], name='unique_comment_like')]
 
 
 class Follow(models.Model):
+    """Подписка. Строки разложены по базам FOLLOW_SHARDS по user_id,
+    поэтому внешние ключи без ограничений в БД: пользователи живут в
+    основной базе. Работать с подписками нужно через posts.sharding.
+    """
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         null=False,
         blank=False,
-        related_name='follower'
+        related_name='follower',
+        db_constraint=False
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         null=False,
         blank=False,
-        related_name='following'
+        related_name='following',
+        db_constraint=False
     )
 
     class Meta:
         constraints = [models.UniqueConstraint(
             fields=['author_id', 'user_id'], name='unique_follow')]
+
+
+class FeedWatermark(models.Model):
+    """Последний увиденный пользователем пост ленты подписок."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_watermark'
+    )
+    pub_date = models.DateTimeField()
+    post_id = models.IntegerField()
+
+
+class FollowShardMap(models.Model):
+    """Шард подписок пользователя, если он отличается от шарда по хешу.
+
+    Пока moving_to заполнено, пользователь переносится: подписки пишутся
+    в оба шарда, а читаются из shard.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='follow_shard'
+    )
+    shard = models.CharField(max_length=64)
+    moving_to = models.CharField(max_length=64, blank=True)
+
+
+class Recommendation(models.Model):
+    """Рекомендованный автор, см. posts.recommendations."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'author'], name='unique_recommendation')]
+
+
+class RecommendationQueue(models.Model):
+    """Пользователь, чьи подписки изменились после расчёта рекомендаций."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+
+
+class PostScore(models.Model):
+    """Затухающая со временем популярность поста, см. posts.trending.
+
+    score — логарифм суммы весов событий, умноженных на
+    exp((t - TRENDING_EPOCH) / tau): так оценку можно наращивать, не
+    пересчитывая затухание старых событий.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending_score'
+    )
+    score = models.FloatField(db_index=True)
@@ -0,0 +1,226 @@
+"""Рекомендации авторов по совместным подпискам.
+
+Граф подписок загружается в разреженную матрицу A (пользователи ×
+авторы). Близость авторов — косинусная мера по совместным подписчикам
+C = AᵀA, у каждого автора остаются NEIGHBOURS ближайших. Оценка автора
+для пользователя — строка A·C без уже подписанных авторов и его самого;
+в таблицу Recommendation пишутся лучшие TOP_K.
+
+Матрицы пересчитываются целиком (на миллионе подписок это секунды), а
+при инкрементальном обновлении переписываются рекомендации только тех
+пользователей, чьи подписки изменились (RecommendationQueue).
+
+Нужны numpy и scipy; без них расчёт недоступен, а страницы просто
+показывают уже посчитанное.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow, Recommendation, RecommendationQueue, User
+from .sharding import following_ids
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+GENERATION_KEY = 'recommendations:generation'
+
+
+def is_available():
+    return np is not None
+
+
+def load_edges():
+    """Пары (user_id, author_id) из всех шардов без повторов."""
+    chunks = [
+        np.array(
+            Follow.objects.using(shard).values_list('user_id', 'author_id'),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        for shard in dict.fromkeys(settings.FOLLOW_SHARDS)
+    ]
+    return np.unique(np.concatenate(chunks), axis=0)
+
+
+def follow_matrix(edges):
+    """Матрица A и массив id пользователей, соответствующих индексам."""
+    ids, inverse = np.unique(edges, return_inverse=True)
+    inverse = inverse.reshape(-1, 2)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(edges), dtype=np.float32),
+         (inverse[:, 0], inverse[:, 1])),
+        shape=(len(ids), len(ids))
+    )
+    return matrix, ids
+
+
+def keep_top(matrix, per_row):
+    """Оставляет в каждой строке per_row наибольших значений."""
+    matrix = matrix.tocsr()
+    indptr, data = matrix.indptr, matrix.data
+    for row in np.flatnonzero(np.diff(indptr) > per_row):
+        start, end = indptr[row], indptr[row + 1]
+        values = data[start:end]
+        threshold = np.partition(values, -per_row)[-per_row]
+        values[values < threshold] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def co_follow(matrix, neighbours):
+    """Косинусная близость авторов по общим подписчикам."""
+    counts = (matrix.T @ matrix).tocsr()
+    counts.setdiag(0)
+    counts.eliminate_zeros()
+    followers = np.asarray(matrix.sum(axis=0)).ravel()
+    norm = sparse.diags(1 / np.sqrt(np.maximum(followers, 1)))
+    return keep_top(norm @ counts @ norm, neighbours)
+
+
+def top_authors(matrix, similarity, rows, top_k):
+    """Лучшие top_k авторов для строк rows.
+
+    Возвращает массивы (строка, автор, оценка), отсортированные по
+    строке и убыванию оценки.
+    """
+    followed = matrix[rows]
+    own = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32),
+         (np.arange(len(rows)), rows)),
+        shape=followed.shape
+    )
+    scores = (followed @ similarity).tocsr()
+    # Уже подписанные авторы и сам пользователь обнуляются.
+    scores = (scores - scores.multiply(followed + own)).tocsr()
+    scores.eliminate_zeros()
+    positions = np.repeat(np.arange(len(rows)), np.diff(scores.indptr))
+    if not len(positions):
+        return rows[:0], positions, scores.data
+    # Один argsort вместо lexsort: номер строки плюс доля от максимума
+    # оценки упорядочивает по строке и убыванию оценки.
+    order = np.argsort(
+        positions + (1 - scores.data / (scores.data.max() * 1.0001))
+    )
+    rank = np.arange(len(order)) - scores.indptr[positions[order]]
+    best = order[rank < top_k]
+    return rows[positions[best]], scores.indices[best], scores.data[best]
+
+
+def compute(edges, user_ids=None, top_k=None, neighbours=None,
+            batch_size=1000, timings=None):
+    """Рекомендации {user_id: [(author_id, оценка)]}.
+
+    user_ids=None — для всех пользователей с подписками. В timings, если
+    передан словарь, пишется время этапов.
+    """
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    neighbours = neighbours or settings.RECOMMENDATIONS_NEIGHBOURS
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    matrix, ids = follow_matrix(edges)
+    timings['matrix'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    similarity = co_follow(matrix, neighbours)
+    timings['co_follow'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if user_ids is None:
+        rows = np.flatnonzero(np.diff(matrix.indptr))
+    else:
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        positions = np.searchsorted(ids, user_ids)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == user_ids[found]
+        rows = positions[found]
+    result = {}
+    for start in range(0, len(rows), batch_size):
+        users, authors, scores = top_authors(
+            matrix, similarity, rows[start:start + batch_size], top_k
+        )
+        for user_id, author_id, score in zip(
+            ids[users].tolist(), ids[authors].tolist(), scores.tolist()
+        ):
+            result.setdefault(user_id, []).append((author_id, score))
+    timings['scores'] = time.perf_counter() - started
+    return result
+
+
+def _chunks(items, size=500):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def store(recommendations, user_ids=None):
+    """Заменяет рекомендации пользователей user_ids (None — всех)."""
+    with transaction.atomic():
+        if user_ids is None:
+            Recommendation.objects.all().delete()
+        for chunk in _chunks(list(user_ids or [])):
+            Recommendation.objects.filter(user_id__in=chunk).delete()
+        Recommendation.objects.bulk_create([
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for user_id, authors in recommendations.items()
+            for author_id, score in authors
+        ], batch_size=500)
+    if user_ids is None:
+        cache.set(GENERATION_KEY, time.time(), None)
+    else:
+        cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def refresh(full=False, timings=None):
+    """Пересчитывает рекомендации: всем или пользователям из очереди.
+
+    Возвращает число пользователей, для которых они посчитаны.
+    """
+    queued = list(RecommendationQueue.objects.values_list(
+        'user_id', flat=True
+    ))
+    if not full and not queued:
+        return 0
+    edges = load_edges()
+    user_ids = None if full else queued
+    recommendations = {}
+    if len(edges):
+        recommendations = compute(edges, user_ids, timings=timings)
+    store(recommendations, user_ids)
+    for chunk in _chunks(queued):
+        RecommendationQueue.objects.filter(user_id__in=chunk).delete()
+    return len(recommendations)
+
+
+def enqueue(user_ids):
+    """Отмечает пользователей для инкрементального пересчёта."""
+    RecommendationQueue.objects.bulk_create([
+        RecommendationQueue(user_id=user_id) for user_id in set(user_ids)
+    ], ignore_conflicts=True)
+
+
+def _cache_key(user_id):
+    generation = cache.get_or_set(GENERATION_KEY, 0, None)
+    return f'recommendations:{generation}:{user_id}'
+
+
+def recommended_authors(user_id, limit=None):
+    """Рекомендованные авторы из таблицы, без уже подписанных."""
+    key = _cache_key(user_id)
+    author_ids = cache.get(key)
+    if author_ids is None:
+        author_ids = list(Recommendation.objects.filter(
+            user_id=user_id
+        ).values_list('author_id', flat=True))
+        cache.set(key, author_ids, settings.RECOMMENDATIONS_CACHE_TIME)
+    following = following_ids(user_id)
+    author_ids = [
+        author_id for author_id in author_ids if author_id not in following
+    ][:limit or settings.RECOMMENDATIONS_SHOWN]
+    if not author_ids:
+        return []
+    authors = User.objects.in_bulk(author_ids)
+    return [authors[pk] for pk in author_ids if pk in authors]
@@ -0,0 +1,48 @@
+from django.conf import settings
+
+from core import replica
+
+from .models import Follow, User
+
+# Модели с таблицами в шардах: подписки и outbox для событий о них.
+SHARD_MODELS = {('posts', 'follow'), ('core', 'outboxevent')}
+
+
+class FollowShardRouter:
+    """Направляет Follow в шард пользователя, см. posts.sharding.
+
+    Для связанных менеджеров вида user.follower шард берётся по
+    пользователю из подсказки instance. Обратную связь author.following
+    роутер разложить по шардам не может: для неё есть
+    posts.sharding.followers_of.
+    """
+
+    def _shard(self, model, hints):
+        if model is not Follow:
+            return None
+        from .sharding import shard_for_user
+        instance = hints.get('instance')
+        if isinstance(instance, Follow) and instance.user_id:
+            return shard_for_user(instance.user_id)
+        if isinstance(instance, User) and instance.pk:
+            return shard_for_user(instance.pk)
+        return settings.FOLLOW_SHARDS[0]
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        shard = self._shard(model, hints)
+        if shard is not None:
+            replica.mark_write()
+        return shard
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if isinstance(obj1, Follow) or isinstance(obj2, Follow):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default' or db not in settings.FOLLOW_SHARDS:
+            return None
+        return (app_label, model_name) in SHARD_MODELS
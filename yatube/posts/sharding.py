@@ -0,0 +1,340 @@
+"""Шардирование подписок по user_id между базами FOLLOW_SHARDS.
+
+Шард пользователя по умолчанию выбирается по хешу user_id, а
+FollowShardMap хранит исключения: пользователей, перенесённых командой
+rebalance_follow_shards, и тех, кто переносится прямо сейчас.
+"""
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from core import replica
+from core.db import insert_ignore
+from core.outbox import publish, publish_many
+
+from .models import Follow, FollowShardMap
+
+NOT_MAPPED = ''
+
+
+def hash_shard(user_id):
+    shards = settings.FOLLOW_SHARDS
+    return shards[user_id % len(shards)]
+
+
+def _map_key(user_id):
+    return f'follow_shard:{user_id}'
+
+
+def _placement(user_id):
+    """Пара (шард для чтения, шард-приёмник при переносе или '')."""
+    key = _map_key(user_id)
+    placement = cache.get(key)
+    if placement is None:
+        row = FollowShardMap.objects.filter(user_id=user_id).values_list(
+            'shard', 'moving_to'
+        ).first()
+        placement = row or (NOT_MAPPED, NOT_MAPPED)
+        cache.set(key, placement, settings.FOLLOW_SHARD_MAP_CACHE_TIME)
+    shard, moving_to = placement
+    return shard or hash_shard(user_id), moving_to
+
+
+def shard_for_user(user_id):
+    """База, в которой лежат подписки пользователя."""
+    if len(settings.FOLLOW_SHARDS) == 1:
+        return settings.FOLLOW_SHARDS[0]
+    return _placement(user_id)[0]
+
+
+def write_shards(user_id):
+    """Базы, куда пишутся подписки: при переносе — обе."""
+    if len(settings.FOLLOW_SHARDS) == 1:
+        return settings.FOLLOW_SHARDS[:1]
+    shard, moving_to = _placement(user_id)
+    return [shard, moving_to] if moving_to else [shard]
+
+
+def set_placement(user_id, shard, moving_to=NOT_MAPPED, pin=False):
+    """Сохраняет размещение пользователя и сбрасывает его кэш.
+
+    Размещение, совпадающее с хешем, не хранится, если не задан pin.
+    """
+    if not pin and not moving_to and shard == hash_shard(user_id):
+        FollowShardMap.objects.filter(user_id=user_id).delete()
+    else:
+        FollowShardMap.objects.update_or_create(
+            user_id=user_id,
+            defaults={'shard': shard, 'moving_to': moving_to}
+        )
+    cache.delete(_map_key(user_id))
+
+
+def follows_of(user_id):
+    """Подписки пользователя из его шарда."""
+    return Follow.objects.using(shard_for_user(user_id)).filter(
+        user_id=user_id
+    )
+
+
+def followed_author_ids(user_id):
+    return list(follows_of(user_id).values_list('author_id', flat=True))
+
+
+class FollowingSet:
+    """Отсортированный массив id авторов, на которых подписан пользователь.
+
+    В кэше хранится как байты массива, 4 байта на подписку. Проверка
+    вхождения — через множество, которое строится при первой проверке.
+    """
+
+    def __init__(self, ids):
+        self.ids = ids
+        self._set = None
+
+    @classmethod
+    def from_bytes(cls, data):
+        ids = array('I')
+        ids.frombytes(data)
+        return cls(ids)
+
+    def __contains__(self, author_id):
+        if self._set is None:
+            self._set = frozenset(self.ids)
+        return author_id in self._set
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _following_key(user_id):
+    return f'following:{user_id}'
+
+
+def following_ids(user_id):
+    """Id авторов, на которых подписан пользователь, из кэша."""
+    key = _following_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = array('I', sorted(followed_author_ids(user_id))).tobytes()
+        cache.set(key, data, settings.FOLLOWING_CACHE_TIME)
+    return FollowingSet.from_bytes(data)
+
+
+def _forget_following(user_id, shards):
+    """Сбрасывает закэшированный массив подписок пользователя.
+
+    Ключ удаляется сразу и ещё раз после фиксации транзакций шардов:
+    чтение, заполнившее кэш до фиксации, оставило бы в нём старый
+    набор на FOLLOWING_CACHE_TIME.
+    """
+    key = _following_key(user_id)
+    cache.delete(key)
+    for shard in set(shards):
+        transaction.on_commit(lambda: cache.delete(key), using=shard)
+
+
+def is_following(user_id, author_id):
+    return author_id in following_ids(user_id)
+
+
+def follow(user_id, author_id):
+    """Создаёт подписку во всех шардах записи пользователя.
+
+    Подписка добавляется одним INSERT без предварительной проверки,
+    повтор уже существующей ничего не делает. Событие follow.created
+    пишется один раз, в транзакции основного шарда пользователя.
+    Возвращает True, если подписки не было.
+    """
+    replica.mark_write()
+    shards = write_shards(user_id)
+    # Основной шард последним: возвращается его результат.
+    for shard in reversed(shards):
+        with transaction.atomic(using=shard):
+            created = insert_ignore(
+                shard, Follow, user=user_id, author=author_id
+            )
+            if created and shard == shards[0]:
+                publish('follow.created', {
+                    'user_id': user_id, 'author_id': author_id
+                }, using=shard)
+    _forget_following(user_id, shards)
+    return created
+
+
+def unfollow(user_id, author_id):
+    """Удаляет подписку одним DELETE. True, если она была."""
+    replica.mark_write()
+    shards = write_shards(user_id)
+    for shard in reversed(shards):
+        with transaction.atomic(using=shard):
+            deleted, _ = Follow.objects.using(shard).filter(
+                user_id=user_id, author_id=author_id
+            ).delete()
+            if deleted and shard == shards[0]:
+                publish('follow.deleted', {
+                    'user_id': user_id, 'author_id': author_id
+                }, using=shard)
+    _forget_following(user_id, shards)
+    return bool(deleted)
+
+
+def follow_many(user_id, author_ids):
+    """Подписывает на авторов пачкой, по транзакции на шард.
+
+    Возвращает id авторов, подписки на которых не было.
+    """
+    replica.mark_write()
+    author_ids = set(author_ids) - {user_id}
+    shards = write_shards(user_id)
+    for shard in reversed(shards):
+        with transaction.atomic(using=shard):
+            existing = set(Follow.objects.using(shard).filter(
+                user_id=user_id, author_id__in=author_ids
+            ).values_list('author_id', flat=True))
+            created = sorted(author_ids - existing)
+            Follow.objects.using(shard).bulk_create([
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in created
+            ], ignore_conflicts=True)
+            if shard == shards[0]:
+                publish_many('follow.created', [
+                    {'user_id': user_id, 'author_id': author_id}
+                    for author_id in created
+                ], using=shard)
+    _forget_following(user_id, shards)
+    return created
+
+
+def unfollow_many(user_id, author_ids):
+    """Отписывает от авторов пачкой. Возвращает id снятых подписок."""
+    replica.mark_write()
+    author_ids = set(author_ids)
+    shards = write_shards(user_id)
+    for shard in reversed(shards):
+        with transaction.atomic(using=shard):
+            follows = Follow.objects.using(shard).filter(
+                user_id=user_id, author_id__in=author_ids
+            )
+            deleted = sorted(follows.values_list('author_id', flat=True))
+            follows.delete()
+            if shard == shards[0]:
+                publish_many('follow.deleted', [
+                    {'user_id': user_id, 'author_id': author_id}
+                    for author_id in deleted
+                ], using=shard)
+    _forget_following(user_id, shards)
+    return deleted
+
+
+def followers_of(author_id):
+    """Подписки на автора из всех шардов."""
+    follows = []
+    for shard in settings.FOLLOW_SHARDS:
+        follows.extend(Follow.objects.using(shard).filter(
+            author_id=author_id
+        ))
+    return follows
+
+
+def _read_shards():
+    """Различные базы FOLLOW_SHARDS в порядке настройки."""
+    return list(dict.fromkeys(settings.FOLLOW_SHARDS))
+
+
+def parse_cursor(cursor):
+    """Курсор «id.номер шарда» в пару чисел или None."""
+    try:
+        follow_id, shard_index = map(int, cursor.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    return follow_id, shard_index
+
+
+def _before(follows, cursor, shard_index):
+    """Строки шарда, идущие после курсора в порядке (id, шард) по убыванию."""
+    if cursor is None:
+        return follows
+    follow_id, cursor_shard = cursor
+    if shard_index < cursor_shard:
+        return follows.filter(id__lte=follow_id)
+    return follows.filter(id__lt=follow_id)
+
+
+def follows_page(cursor, limit, user_id=None, author_id=None):
+    """Страница подписок пользователя или подписчиков автора.
+
+    Ключевая пагинация по (Follow.id, номер шарда) от новых к старым:
+    из каждого шарда берётся не больше limit + 1 строк после курсора,
+    и они сливаются. Подписки лежат в шарде пользователя, поэтому
+    копии строк переносимого пользователя из чужого шарда пропускаются.
+    Возвращает строки Follow и курсор следующей страницы или None.
+    """
+    cursor = parse_cursor(cursor)
+    if user_id is not None:
+        shard = shard_for_user(user_id)
+        shards = [(_read_shards().index(shard), shard)]
+        lookup = {'user_id': user_id}
+    else:
+        shards = list(enumerate(_read_shards()))
+        lookup = {'author_id': author_id}
+    rows = []
+    for shard_index, shard in shards:
+        follows = Follow.objects.using(shard).filter(**lookup)
+        rows.extend(
+            (follow.id, shard_index, follow)
+            for follow in _before(follows, cursor, shard_index).order_by(
+                '-id'
+            )[:limit + 1]
+        )
+    rows.sort(key=lambda row: row[:2], reverse=True)
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        follow_id, shard_index, _ = page[-1]
+        next_cursor = f'{follow_id}.{shard_index}'
+    read_shards = _read_shards()
+    return [
+        follow for _, shard_index, follow in page
+        if user_id is not None
+        or shard_for_user(follow.user_id) == read_shards[shard_index]
+    ], next_cursor
+
+
+def follows_back(user_id, author_ids):
+    """Кто из авторов подписан на пользователя: запрос на шард."""
+    by_shard = {}
+    for author_id in author_ids:
+        by_shard.setdefault(shard_for_user(author_id), []).append(author_id)
+    mutual = set()
+    for shard, ids in by_shard.items():
+        mutual.update(Follow.objects.using(shard).filter(
+            user_id__in=ids, author_id=user_id
+        ).values_list('user_id', flat=True))
+    return mutual
+
+
+def feed_filter(user_id):
+    """Условие на Post для ленты подписок пользователя.
+
+    Если подписки лежат в той же базе, что и посты, это JOIN, иначе
+    список id авторов, полученный отдельным запросом к шарду.
+    """
+    if shard_for_user(user_id) == DEFAULT_DB_ALIAS:
+        return Q(author__following__user_id=user_id)
+    return Q(author_id__in=followed_author_ids(user_id))
+
+
+def delete_user_follows(user_id):
+    """Удаляет подписки пользователя и на пользователя во всех шардах."""
+    for shard in settings.FOLLOW_SHARDS:
+        Follow.objects.using(shard).filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        ).delete()
+    cache.delete(_following_key(user_id))
@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import delta
+from .lookups import group_by_slug, user_by_username
+from .models import Post, User
+from .sharding import delete_user_follows
+
+group_by_slug.connect()
+user_by_username.connect()
+
+
+@receiver(post_delete, sender=User)
+def delete_sharded_follows(sender, instance, **kwargs):
+    """Каскад до подписок в других шардах: БД его не сделает."""
+    delete_user_follows(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def remember_latest_post(sender, instance, created, **kwargs):
+    """Отметка ставится сразу, не дожидаясь фиксации: если транзакция
+    откатится, опрос лишь зря сходит в базу и ответит 304."""
+    if created:
+        delta.remember(instance)
+
+
+@receiver(post_delete, sender=Post)
+def forget_latest_post(sender, instance, **kwargs):
+    """Удалён, возможно, самый новый пост: отметка посчитается заново."""
+    cache.delete(delta.LATEST_KEY)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_post_card(sender, instance, **kwargs):
+    """Сбрасывает закэшированную карточку изменённого поста."""
+    cache.delete(make_template_fragment_key('post_card', [instance.pk]))
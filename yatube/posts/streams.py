@@ -0,0 +1,154 @@
+"""Поток новых комментариев поста по Server-Sent Events (ASGI).
+
+Комментарии приходят из outbox (comment.created) через общий хаб
+процесса, см. core.pubsub. При подключении клиент передаёт id последнего
+комментария, который у него есть (?after= или заголовок Last-Event-ID
+при переподключении), и сначала получает пропущенные.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.utils.dateformat import format as format_date
+from django.utils.timezone import localtime
+
+from core.fast_urls import fast_reverse
+from core.pubsub import OutboxHub
+
+from .models import Comment, Post
+
+
+def comment_message(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'author_name': comment.author.get_full_name(),
+        'author_url': fast_reverse(
+            'posts:profile', comment.author.username
+        ),
+        'text': comment.text,
+        'created': format_date(
+            localtime(comment.created), settings.DATETIME_FORMAT
+        ),
+    }
+
+
+def load_comments(events):
+    comments = Comment.objects.select_related('author').in_bulk(
+        [event.data['id'] for event in events]
+    )
+    return {
+        event.pk: comment_message(comments[event.data['id']])
+        for event in events if event.data['id'] in comments
+    }
+
+
+def missed_comments(post_id, after):
+    return [
+        comment_message(comment)
+        for comment in Comment.objects.select_related('author').filter(
+            post_id=post_id, pk__gt=after
+        ).order_by('pk')[:settings.SSE_REPLAY_LIMIT]
+    ]
+
+
+comments_hub = OutboxHub(
+    'comment.created', lambda event: event.data['post_id'], load_comments
+)
+
+
+def encode(message):
+    return (
+        f'id: {message["id"]}\nevent: comment\n'
+        f'data: {json.dumps(message, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+def _after(scope):
+    """id последнего комментария клиента: Last-Event-ID или ?after=."""
+    headers = dict(scope.get('headers', []))
+    values = [headers.get(b'last-event-id', b'').decode()]
+    for pair in scope.get('query_string', b'').decode().split('&'):
+        name, _, value = pair.partition('=')
+        if name == 'after':
+            values.append(value)
+    for value in values:
+        if value.isdigit():
+            return int(value)
+    return None
+
+
+async def comment_stream(scope, receive, send, post_id):
+    """ASGI-обработчик потока комментариев поста post_id."""
+    if not await comments_hub.run_sync(
+        Post.objects.filter(pk=post_id).exists
+    ):
+        await not_found(send)
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    queue = comments_hub.subscribe(post_id)
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        last_sent = _after(scope)
+        if last_sent is not None:
+            for message in await comments_hub.run_sync(
+                missed_comments, post_id, last_sent
+            ):
+                await send_message(send, message)
+                last_sent = message['id']
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {settings.SSE_RETRY * 1000}\n\n'.encode(),
+            'more_body': True,
+        })
+        while not disconnected.done():
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                [getter, disconnected], timeout=settings.SSE_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter not in done:
+                getter.cancel()
+                if not disconnected.done():
+                    await send({
+                        'type': 'http.response.body', 'body': b': ping\n\n',
+                        'more_body': True,
+                    })
+                continue
+            message = getter.result()
+            if last_sent is None or message['id'] > last_sent:
+                await send_message(send, message)
+                last_sent = message['id']
+    finally:
+        comments_hub.unsubscribe(post_id, queue)
+        disconnected.cancel()
+
+
+async def not_found(send):
+    await send({
+        'type': 'http.response.start', 'status': 404,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': b'Not Found'})
+
+
+async def send_message(send, message):
+    await send({
+        'type': 'http.response.body', 'body': encode(message),
+        'more_body': True,
+    })
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
@@ -0,0 +1,44 @@
+"""Фоновые задачи постов."""
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.taskqueue import task
+
+from .models import Post
+
+# Миниатюры из шаблонов: includes/post.html и posts/post_detail.html.
+POST_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+    ('960', {'crop': 'center', 'upscale': True}),
+]
+
+
+def make_post_thumbnails(post):
+    for geometry, options in POST_THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+@task
+def make_thumbnails(post_id):
+    """Заранее создаёт миниатюры картинки поста."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        make_post_thumbnails(post)
+
+
+@task(priority=-5, max_attempts=1)
+def warm_caches():
+    """Прогрев страниц и миниатюр с настройками WARM_CACHES_*."""
+    from . import warming
+
+    warming.warm(
+        settings.WARM_CACHES_PAGES, settings.WARM_CACHES_PROFILES,
+        settings.WARM_CACHES_THREADS, settings.WARM_CACHES_BASE_URL
+    )
+
+
+@task(priority=-5, max_attempts=1)
+def refresh_recommendations(full=False):
+    from . import recommendations
+
+    recommendations.refresh(full)
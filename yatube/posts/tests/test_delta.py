@@ -0,0 +1,113 @@
+"""Тестирование опроса новых постов по курсору."""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import delta
+from ..models import Post, User
+from ..sharding import follow
+
+
+class FeedDeltaTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        follow(cls.reader.pk, cls.author.pk)
+        cls.old = Post.objects.create(text='Старый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:feed_delta')
+        self.cursor = delta.make_cursor(self.old.pub_date, self.old.pk)
+
+    def test_cursor_round_trip(self):
+        """Курсор однозначно восстанавливает время и id поста."""
+        self.assertEqual(
+            delta.parse_cursor(self.cursor), (self.old.pub_date, self.old.pk)
+        )
+        self.assertIsNone(delta.parse_cursor('abc'))
+
+    def test_nothing_new_without_queries(self):
+        """Без новых постов — 304 по отметке из кэша, без запросов."""
+        self.client.get(self.url, {'cursor': self.cursor})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'cursor': self.cursor})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_new_posts_json(self):
+        """Новые посты приходят от новых к старым с новым курсором."""
+        self.client.get(self.url, {'cursor': self.cursor})
+        posts = [
+            Post.objects.create(text=f'Новый {number}', author=self.author)
+            for number in range(3)
+        ]
+        response = self.client.get(
+            self.url, {'cursor': self.cursor, 'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['posts']],
+            [post.pk for post in reversed(posts)]
+        )
+        self.assertFalse(data['has_more'])
+        response = self.client.get(self.url, {'cursor': data['cursor']})
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(FEED_DELTA_LIMIT=2)
+    def test_has_more(self):
+        """Сверх предела — ближайшие к курсору посты и has_more."""
+        posts = [
+            Post.objects.create(text=f'Новый {number}', author=self.author)
+            for number in range(3)
+        ]
+        response = self.client.get(self.url, {'cursor': self.cursor})
+        self.assertEqual(response['X-Feed-Has-More'], 'true')
+        self.assertEqual(
+            [post.pk for post in response.context['posts']],
+            [posts[1].pk, posts[0].pk]
+        )
+        response = self.client.get(
+            self.url, {'cursor': response['X-Feed-Cursor']}
+        )
+        self.assertEqual(response['X-Feed-Has-More'], 'false')
+        self.assertContains(response, 'Новый 2')
+
+    def test_follow_feed(self):
+        """feed=follow отдаёт только посты подписок."""
+        Post.objects.create(text='Чужой пост', author=self.other)
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(
+            self.url, {'cursor': self.cursor, 'feed': 'follow'}
+        )
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Пост подписки', author=self.author)
+        response = client.get(
+            self.url, {'cursor': self.cursor, 'feed': 'follow'}
+        )
+        self.assertContains(response, 'Пост подписки')
+        self.assertNotContains(response, 'Чужой пост')
+        self.assertEqual(
+            self.client.get(self.url, {'feed': 'follow'}).status_code, 403
+        )
+
+    def test_same_pub_date_uses_id(self):
+        """Посты с тем же временем, что у курсора, различаются по id."""
+        twin = Post.objects.create(text='Близнец', author=self.author)
+        Post.objects.filter(pk=twin.pk).update(pub_date=self.old.pub_date)
+        earlier = Post.objects.create(text='Раньше', author=self.author)
+        Post.objects.filter(pk=earlier.pk).update(
+            pub_date=self.old.pub_date - timedelta(seconds=1)
+        )
+        cache.clear()
+        posts, _ = delta.since(
+            Post.objects.all(),
+            (self.old.pub_date, self.old.pk), 10
+        )
+        self.assertEqual(posts, [twin])
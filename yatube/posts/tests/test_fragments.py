@@ -0,0 +1,136 @@
+"""Тестирование фрагментов ленты для бесконечной прокрутки."""
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import trending
+from ..models import Group, Post, User
+from ..sharding import follow
+
+
+@override_settings(QTY_POSTS=3)
+class FeedFragmentTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        follow(cls.reader.pk, cls.author.pk)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(8)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+        self.feeds = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        ]
+
+    def walk(self, url):
+        """Id постов всех порций ленты по курсорам."""
+        ids, cursor = [], ''
+        while True:
+            response = self.client.get(
+                url, {'fragment': 1, 'cursor': cursor}
+            )
+            ids.extend(post.pk for post in response.context['posts'])
+            cursor = response['X-Next-Cursor']
+            if not cursor:
+                return ids
+
+    def test_fragment_has_only_cards(self):
+        """Фрагмент — карточки без шапки и намного меньше страницы."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                page = self.client.get(url)
+                fragment = self.client.get(url, {'fragment': 1})
+                self.assertTemplateUsed(
+                    fragment, 'posts/includes/post_cards.html'
+                )
+                self.assertTemplateNotUsed(fragment, 'base.html')
+                self.assertNotContains(fragment, '<html')
+                self.assertContains(fragment, 'class="post-card"', 3)
+                self.assertLess(
+                    len(fragment.content) * 2, len(page.content)
+                )
+
+    def test_cursor_walks_whole_feed(self):
+        """Порции по курсору проходят ленту без пропусков и повторов."""
+        expected = [post.pk for post in reversed(self.posts)]
+        for url in self.feeds:
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), expected)
+
+    def test_new_post_does_not_shift_pages(self):
+        """Новый пост не сдвигает следующие порции."""
+        url = self.feeds[0]
+        response = self.client.get(url, {'fragment': 1})
+        Post.objects.create(text='Свежий', author=self.author)
+        response = self.client.get(
+            url, {'fragment': 1, 'cursor': response['X-Next-Cursor']}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['posts']],
+            [post.pk for post in reversed(self.posts[2:5])]
+        )
+
+    def test_bad_cursor(self):
+        response = self.client.get(
+            self.feeds[0], {'fragment': 1, 'cursor': 'abc'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cards_are_cached(self):
+        """Карточки берутся из кэша, а лайки остаются свежими."""
+        url = self.feeds[0]
+        self.client.get(url, {'fragment': 1})
+        Post.objects.filter(pk=self.posts[-1].pk).update(text='Тайком')
+        response = self.client.get(url, {'fragment': 1})
+        self.assertContains(response, 'Пост 7')
+        self.client.post(
+            reverse('posts:post_like', args=[self.posts[-1].pk])
+        )
+        response = self.client.get(url, {'fragment': 1})
+        self.assertIn(self.posts[-1].pk, response.context['liked_posts'])
+
+    def test_like_returns_to_feed(self):
+        """После лайка из фрагмента возвращаемся на ленту, а не во фрагмент."""
+        post = self.posts[-1]
+        like_url = reverse('posts:post_like', args=[post.pk])
+        trending.rebuild()
+        feeds = [
+            (self.feeds[1], {'fragment': 1, 'cursor': ''}, self.feeds[1]),
+            (self.feeds[0], {'fragment': 1, 'feed': 'trending'},
+             f'{self.feeds[0]}?feed=trending'),
+            (reverse('posts:feed_delta'), {'feed': 'follow'},
+             self.feeds[3]),
+        ]
+        for url, params, expected in feeds:
+            with self.subTest(url=url):
+                response = self.client.get(url, params)
+                self.assertContains(
+                    response, f'{like_url}?next={quote(expected)}'
+                )
+
+    def test_edit_resets_card(self):
+        """Правка поста сбрасывает его карточку."""
+        url = self.feeds[0]
+        self.client.get(url, {'fragment': 1})
+        post = self.posts[-1]
+        post.text = 'Исправленный'
+        post.save()
+        response = self.client.get(url, {'fragment': 1})
+        self.assertContains(response, 'Исправленный')
+        self.assertNotContains(response, 'Пост 7')
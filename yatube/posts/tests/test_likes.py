@@ -0,0 +1,116 @@
+"""Тестирование лайков."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import likes
+from ..counters import post_likes
+from ..models import Comment, Group, Post, PostLike, User
+
+
+class LikesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(10)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Ответ'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_like_once_per_user(self):
+        """Повторный лайк не дублирует строку и не меняет счётчик."""
+        post = self.posts[0]
+        self.assertTrue(likes.like('post', self.reader.pk, post.pk))
+        self.assertFalse(likes.like('post', self.reader.pk, post.pk))
+        post.refresh_from_db()
+        self.assertEqual(post.likes, 1)
+        self.assertEqual(PostLike.objects.count(), 1)
+        self.assertTrue(likes.unlike('post', self.reader.pk, post.pk))
+        self.assertFalse(likes.unlike('post', self.reader.pk, post.pk))
+        post.refresh_from_db()
+        self.assertEqual(post.likes, 0)
+
+    def test_liked_page_in_one_query(self):
+        """Лайки пользователя для страницы ленты — один запрос."""
+        for post in self.posts[::3]:
+            likes.like('post', self.reader.pk, post.pk)
+        page = Post.objects.filter(group=self.group)[:10]
+        with self.assertNumQueries(1):
+            liked = likes.liked('post', self.reader, page)
+        self.assertEqual(liked, [post.pk for post in self.posts[::3]])
+
+    def test_feed_costs_one_extra_query(self):
+        """Лента из 10 постов с лайками стоит на один запрос больше."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        guest = Client()
+        guest.get(url)
+        with CaptureQueriesContext(connection) as guest_queries:
+            guest.get(url)
+        likes.like('post', self.reader.pk, self.posts[0].pk)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as reader_queries:
+            response = self.client.get(url)
+        # Сессия и пользователь плюс один запрос лайков.
+        self.assertEqual(len(reader_queries), len(guest_queries) + 2 + 1)
+        self.assertEqual(response.context['liked_posts'], [self.posts[0].pk])
+
+    def test_like_views(self):
+        """Лайк — POST-форма; он и снятие лайка ведут на страницу из next."""
+        post = self.posts[0]
+        next_url = reverse('posts:group_list', args=[self.group.slug])
+        like_url = reverse('posts:post_like', args=[post.pk])
+        self.assertEqual(self.client.get(like_url).status_code, 405)
+        response = self.client.post(f'{like_url}?next={next_url}')
+        self.assertRedirects(response, next_url)
+        response = self.client.post(
+            reverse('posts:comment_like', args=[self.comment.pk])
+            + '?next=https://example.com/'
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[post.pk])
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.context['liked_posts'], [post.pk])
+        self.assertEqual(
+            response.context['liked_comments'], [self.comment.pk]
+        )
+        self.assertContains(
+            response, reverse('posts:post_unlike', args=[post.pk])
+        )
+        self.client.post(reverse('posts:post_unlike', args=[post.pk]))
+        self.assertEqual(post_likes.value(Post.objects.get(pk=post.pk)), 0)
+
+    def test_like_form_needs_csrf_token(self):
+        """Лайк без CSRF-токена отклоняется, а форма на ленте его несёт."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.reader)
+        like_url = reverse('posts:post_like', args=[self.posts[0].pk])
+        response = client.post(like_url)
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(PostLike.objects.exists())
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        response = client.post(like_url, {
+            'csrfmiddlewaretoken': str(response.context['csrf_token'])
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(PostLike.objects.exists())
@@ -0,0 +1,86 @@
+"""Тестирование кэшированного поиска групп и пользователей."""
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db.models import QuerySet
+from django.http import Http404
+from django.test import TestCase
+
+from core import replica
+
+from ..lookups import group_by_slug, user_by_username
+from ..models import Group, User
+
+
+class CachedLookupTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.LOOKUP_MISSES_CACHE].clear()
+
+    def test_found_object_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(group_by_slug.get('group'), self.group)
+            self.assertEqual(group_by_slug.get('group'), self.group)
+
+    def test_missing_object_is_cached(self):
+        """Повторный поиск несуществующего имени не ходит в базу."""
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                with self.assertRaises(Http404):
+                    user_by_username.get_or_404('nobody')
+
+    def test_misses_do_not_evict_found_objects(self):
+        """Перебор несуществующих имён не вытесняет найденные объекты."""
+        group_by_slug.get('group')
+        for number in range(500):
+            user_by_username.get(f'bot-{number}')
+        with self.assertNumQueries(0):
+            self.assertEqual(group_by_slug.get('group'), self.group)
+
+    def test_cached_replica_object_follows_pin(self):
+        """Объект с реплики из кэша не уводит закреплённый запрос."""
+        group = Group.objects.get(pk=self.group.pk)
+        group._state.db = 'replica'
+        with mock.patch.object(QuerySet, 'first', return_value=group):
+            group_by_slug.get('group')
+        replica.begin_request(False)
+        self.addCleanup(replica.end_request)
+        cached = group_by_slug.get('group')
+        self.assertEqual(cached.group_posts.all().db, 'default')
+
+    def test_creation_invalidates_negative_entry(self):
+        self.assertIsNone(user_by_username.get('newcomer'))
+        user = User.objects.create_user(username='newcomer')
+        self.assertEqual(user_by_username.get('newcomer'), user)
+
+    def test_rename_invalidates_old_and_new_value(self):
+        group = Group.objects.get(pk=self.group.pk)
+        group_by_slug.get('group')
+        group.slug = 'renamed'
+        group.title = 'Новое название'
+        group.save()
+        self.assertIsNone(group_by_slug.get('group'))
+        self.assertEqual(
+            group_by_slug.get('renamed').title, 'Новое название'
+        )
+
+    def test_delete_invalidates(self):
+        user = User.objects.create_user(username='leaving')
+        user_by_username.get('leaving')
+        user.delete()
+        self.assertIsNone(user_by_username.get('leaving'))
+
+    def test_profile_view_uses_cache(self):
+        """Страница несуществующего автора отвечает 404 без запроса."""
+        self.client.get('/profile/ghost/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/profile/ghost/')
+        self.assertEqual(response.status_code, 404)
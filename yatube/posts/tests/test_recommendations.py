@@ -0,0 +1,78 @@
+"""Тестирование рекомендаций авторов."""
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core import outbox
+
+from .. import recommendations
+from ..models import Follow, Recommendation, RecommendationQueue, User
+from ..sharding import follow
+
+
+@skipUnless(find_spec('scipy'), 'numpy и scipy не установлены')
+class RecommendationsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Двое читателей подписаны на A и B, третий — только на A."""
+        cls.author_a = User.objects.create_user(username='author_a')
+        cls.author_b = User.objects.create_user(username='author_b')
+        cls.author_c = User.objects.create_user(username='author_c')
+        cls.readers = [
+            User.objects.create_user(username=f'reader_{number}')
+            for number in range(3)
+        ]
+        for reader in cls.readers[:2]:
+            Follow.objects.create(user=reader, author=cls.author_a)
+            Follow.objects.create(user=reader, author=cls.author_b)
+        Follow.objects.create(user=cls.readers[1], author=cls.author_c)
+        Follow.objects.create(user=cls.readers[2], author=cls.author_a)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_co_followed_authors_are_recommended(self):
+        """Рекомендуются авторы с общими подписчиками, кроме уже своих."""
+        result = recommendations.compute(recommendations.load_edges())
+        ranked = [author for author, _ in result[self.readers[2].id]]
+        self.assertEqual(ranked, [self.author_b.id, self.author_c.id])
+        self.assertEqual(
+            [author for author, _ in result[self.readers[0].id]],
+            [self.author_c.id]
+        )
+
+    def test_incremental_refresh_uses_queue(self):
+        """Инкрементальный пересчёт переписывает только пользователей из
+        очереди, которую пополняют события подписок."""
+        recommendations.refresh(full=True)
+        follow(self.readers[2].id, self.author_b.id)
+        outbox.autodiscover()
+        outbox.dispatch_pending('default')
+        self.assertEqual(
+            list(RecommendationQueue.objects.values_list(
+                'user_id', flat=True
+            )),
+            [self.readers[2].id]
+        )
+        self.assertEqual(recommendations.refresh(), 1)
+        self.assertEqual(
+            list(Recommendation.objects.filter(
+                user=self.readers[2]
+            ).values_list('author_id', flat=True)),
+            [self.author_c.id]
+        )
+        self.assertFalse(RecommendationQueue.objects.exists())
+
+    def test_follow_page_shows_recommendations(self):
+        recommendations.refresh(full=True)
+        self.client.force_login(self.readers[2])
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['recommendations'],
+            [self.author_b, self.author_c]
+        )
+        self.assertContains(response, 'Кого почитать')
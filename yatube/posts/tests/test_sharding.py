@@ -0,0 +1,256 @@
+"""Тестирование шардирования подписок."""
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import OutboxEvent
+
+from ..management.commands.rebalance_follow_shards import Command
+from ..models import Follow, FollowShardMap, Post, User
+from ..sharding import (
+    follow, followed_author_ids, followers_of, following_ids, follows_back,
+    follows_page, is_following, set_placement, unfollow, write_shards
+)
+
+
+@override_settings(FOLLOW_SHARDS=['default', 'default'])
+class FollowShardingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём читателя и двух авторов."""
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author_1 = User.objects.create_user(username='author_1')
+        cls.author_2 = User.objects.create_user(username='author_2')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_helpers(self):
+        """Подписка, проверка, список и отписка через шард пользователя."""
+        follow(self.reader.id, self.author_1.id)
+        follow(self.reader.id, self.author_1.id)
+        follow(self.reader.id, self.author_2.id)
+        self.assertTrue(is_following(self.reader.id, self.author_1.id))
+        self.assertCountEqual(
+            followed_author_ids(self.reader.id),
+            [self.author_1.id, self.author_2.id]
+        )
+        self.assertEqual(len(followers_of(self.author_1.id)), 2)
+        unfollow(self.reader.id, self.author_1.id)
+        self.assertFalse(is_following(self.reader.id, self.author_1.id))
+
+    def test_moving_user_writes_to_both_shards(self):
+        """Во время переноса подписки пишутся в оба шарда."""
+        set_placement(self.reader.id, 'default', moving_to='default')
+        self.assertEqual(write_shards(self.reader.id), ['default', 'default'])
+        set_placement(self.reader.id, 'default', pin=True)
+        self.assertEqual(write_shards(self.reader.id), ['default'])
+        self.assertTrue(FollowShardMap.objects.filter(
+            user=self.reader
+        ).exists())
+
+    def test_deleted_user_follows_removed(self):
+        """Удаление пользователя удаляет его подписки во всех шардах."""
+        follow(self.reader.id, self.author_1.id)
+        follow(self.author_1.id, self.reader.id)
+        User.objects.get(pk=self.reader.pk).delete()
+        self.assertFalse(Follow.objects.exists())
+
+    def test_following_set_is_cached_and_reset(self):
+        """Множество подписок читается из кэша и сбрасывается записью."""
+        follow(self.reader.id, self.author_2.id)
+        following_ids(self.reader.id)
+        with self.assertNumQueries(0):
+            self.assertIn(self.author_2.id, following_ids(self.reader.id))
+        follow(self.reader.id, self.author_1.id)
+        unfollow(self.reader.id, self.author_2.id)
+        with self.assertNumQueries(1):
+            following = following_ids(self.reader.id)
+        self.assertEqual(list(following), [self.author_1.id])
+        self.assertNotIn(self.author_2.id, following)
+
+    def test_post_detail_follow_link(self):
+        """На странице поста ссылка подписки зависит от множества."""
+        post = Post.objects.create(text='Пост', author=self.author_1)
+        self.client.force_login(self.reader)
+        response = self.client.get(post.get_absolute_url())
+        self.assertContains(response, 'подписаться')
+        follow(self.reader.id, self.author_1.id)
+        response = self.client.get(post.get_absolute_url())
+        self.assertContains(response, 'отписаться')
+
+    def test_follow_is_single_insert(self):
+        """Подписка — один INSERT, повтор ничего не создаёт."""
+        with self.settings(FOLLOW_SHARDS=['default']):
+            with self.assertNumQueries(4):
+                self.assertTrue(follow(self.reader.id, self.author_1.id))
+            self.assertFalse(follow(self.reader.id, self.author_1.id))
+        self.assertEqual(Follow.objects.count(), 1)
+
+
+class FollowsPageTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора и пятерых подписчиков."""
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader_{number}')
+            for number in range(5)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.readers[0])
+
+    def test_keyset_pages_cover_all_rows_once(self):
+        """Курсор проходит подписчиков от новых к старым без повторов."""
+        seen = []
+        cursor = None
+        while True:
+            follows, cursor = follows_page(cursor, 2, author_id=self.author.id)
+            seen.extend(follow.user_id for follow in follows)
+            if cursor is None:
+                break
+        self.assertEqual(
+            seen, [reader.id for reader in reversed(self.readers)]
+        )
+
+    def test_bad_cursor_starts_from_first_page(self):
+        follows, _ = follows_page('junk', 10, user_id=self.author.id)
+        self.assertEqual([follow.author_id for follow in follows],
+                         [self.readers[0].id])
+
+    def test_follows_back(self):
+        reader_ids = [reader.id for reader in self.readers]
+        self.assertEqual(
+            follows_back(self.author.id, reader_ids), set(reader_ids)
+        )
+        self.assertEqual(
+            follows_back(self.readers[1].id, [self.author.id]), set()
+        )
+
+
+class FollowingCacheCommitTest(TransactionTestCase):
+
+    def test_stale_fill_before_commit_is_dropped(self):
+        """Набор, закэшированный до фиксации подписки, сбрасывается."""
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        with transaction.atomic():
+            follow(reader.id, author.id)
+            # Параллельный запрос ещё видит набор без новой подписки.
+            cache.set(f'following:{reader.id}', b'')
+        self.assertIn(author.id, following_ids(reader.id))
+
+
+@override_settings(FOLLOW_SHARDS=['default', 'follows_b'])
+class RebalanceTest(TransactionTestCase):
+    """Перенос подписок между двумя настоящими базами."""
+
+    databases = {'default', 'follows_b'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases['follows_b'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory.name, 'follows_b.sqlite3'),
+        }
+        with connections['follows_b'].schema_editor() as editor:
+            editor.create_model(Follow)
+            editor.create_model(OutboxEvent)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['follows_b'].close()
+        del connections['follows_b']
+        del connections.databases['follows_b']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author_{number}')
+            for number in range(3)
+        ]
+        set_placement(self.reader.id, 'default', pin=True)
+        for author in self.authors:
+            follow(self.reader.id, author.id)
+
+    def rebalance(self, during_grace):
+        pauses = []
+
+        def sleep(seconds):
+            pauses.append(seconds)
+            during_grace[len(pauses) - 1]()
+
+        with mock.patch(
+            'posts.management.commands.rebalance_follow_shards.time.sleep',
+            sleep
+        ):
+            call_command(
+                'rebalance_follow_shards', '--user', str(self.reader.id),
+                '--to', 'follows_b', '--grace', '0', stdout=StringIO()
+            )
+
+    def author_ids(self, shard):
+        return set(Follow.objects.using(shard).filter(
+            user_id=self.reader.id
+        ).values_list('author_id', flat=True))
+
+    def test_move_keeps_changes_made_during_move(self):
+        """Подписки и отписки во время переноса не теряются."""
+        late = User.objects.create_user(username='late')
+        first, second, _ = self.authors
+        self.rebalance([
+            lambda: (
+                follow(self.reader.id, late.id),
+                unfollow(self.reader.id, first.id),
+            ),
+            lambda: unfollow(self.reader.id, second.id),
+        ])
+        self.assertEqual(
+            self.author_ids('follows_b'), {self.authors[2].id, late.id}
+        )
+        self.assertEqual(self.author_ids('default'), set())
+        self.assertEqual(write_shards(self.reader.id), ['follows_b'])
+
+    def test_move_keeps_follow_ids(self):
+        """Скопированные подписки сохраняют id для курсоров ленты."""
+        before = dict(Follow.objects.filter(
+            user_id=self.reader.id
+        ).values_list('author_id', 'id'))
+        self.rebalance([lambda: None, lambda: None])
+        self.assertEqual(dict(Follow.objects.using('follows_b').filter(
+            user_id=self.reader.id
+        ).values_list('author_id', 'id')), before)
+
+    def test_move_drops_follow_resurrected_by_copy(self):
+        """Отписка, попавшая между чтением источника и вставкой,
+        не возвращается копией."""
+        first = self.authors[0]
+        copy = Command.copy
+
+        def racing_copy(command, user_id, source, target):
+            copy(command, user_id, source, target)
+            # Строку в приёмнике отписка удалила до вставки копии.
+            Follow.objects.filter(
+                user_id=user_id, author_id=first.id
+            ).delete()
+
+        with mock.patch.object(Command, 'copy', racing_copy):
+            self.rebalance([lambda: None, lambda: None])
+        self.assertEqual(
+            self.author_ids('follows_b'),
+            {author.id for author in self.authors[1:]}
+        )
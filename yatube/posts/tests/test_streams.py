@@ -0,0 +1,108 @@
+"""Тестирование потока комментариев по SSE."""
+import asyncio
+
+from django.test import TransactionTestCase, override_settings
+
+from yatube.asgi import application
+
+from ..models import Comment, Post, User
+from ..streams import comments_hub
+
+
+class AsgiClient:
+    """Запрос к ASGI-приложению в цикле событий теста."""
+
+    def __init__(self, path, query=b'', headers=()):
+        self.scope = {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query, 'headers': list(headers),
+        }
+        self.messages = []
+        self.disconnect = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    def run(self):
+        return asyncio.ensure_future(
+            application(self.scope, self.receive, self.send)
+        )
+
+    @property
+    def body(self):
+        return b''.join(
+            message.get('body', b'') for message in self.messages
+        ).decode()
+
+    async def wait_for(self, text, timeout=5):
+        for _ in range(int(timeout / 0.01)):
+            if text in self.body:
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError(f'{text!r} не пришло: {self.body!r}')
+
+
+@override_settings(SSE_POLL_INTERVAL=0.01, SSE_KEEPALIVE=0.05)
+class CommentStreamTest(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.path = f'/stream/posts/{self.post.pk}/comments/'
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def comment(self, text):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text
+        )
+
+    def test_pushes_new_comments(self):
+        """Слушатель получает пропущенные и новые комментарии поста."""
+        first = self.comment('Первый')
+        self.comment('Пропущенный')
+        other_post = Post.objects.create(text='Другой', author=self.user)
+
+        async def scenario():
+            client = AsgiClient(self.path, f'after={first.pk}'.encode())
+            other = AsgiClient(f'/stream/posts/{other_post.pk}/comments/')
+            tasks = [client.run(), other.run()]
+            await client.wait_for('Пропущенный')
+            await asyncio.sleep(0.05)
+            self.comment('Новый')
+            await client.wait_for('Новый')
+            await client.wait_for(': ping')
+            for listener in (client, other):
+                listener.disconnect.set()
+            await asyncio.gather(*tasks)
+            # Без слушателей хаб останавливается сам.
+            await asyncio.wait_for(comments_hub._task, 1)
+            return client, other
+
+        client, other = self.loop.run_until_complete(scenario())
+        self.assertEqual(client.messages[0]['status'], 200)
+        self.assertNotIn('Первый', client.body)
+        self.assertEqual(client.body.count('event: comment'), 2)
+        self.assertNotIn('event: comment', other.body)
+        self.assertFalse(comments_hub.subscribers)
+
+    def test_unknown_post(self):
+        """Поток несуществующего поста отвечает 404 и не подписывается."""
+        client = AsgiClient(f'/stream/posts/{self.post.pk + 1}/comments/')
+        self.loop.run_until_complete(client.run())
+        self.assertEqual(client.messages[0]['status'], 404)
+        self.assertFalse(comments_hub.subscribers)
+
+    def test_unknown_path(self):
+        """Остальные пути ASGI-приложение не обслуживает."""
+        client = AsgiClient('/posts/')
+        self.loop.run_until_complete(client.run())
+        self.assertEqual(client.messages[0]['status'], 404)
@@ -0,0 +1,100 @@
+"""Тестирование ленты популярного."""
+import math
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import outbox
+
+from .. import trending
+from ..models import Comment, Post, PostScore, User
+
+
+@override_settings(TRENDING_HALF_LIFE=3600)
+class TrendingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.user)
+        cls.popular = Post.objects.create(text='Обсуждаемый', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        outbox.autodiscover()
+        outbox.dispatch_pending('default')
+
+    def test_events_raise_score(self):
+        """Новые посты и комментарии через outbox меняют топ."""
+        self.assertEqual(
+            trending.top_ids(), [self.popular.pk, self.quiet.pk]
+        )
+        for _ in range(2):
+            Comment.objects.create(
+                post=self.quiet, author=self.user, text='Ответ'
+            )
+        outbox.dispatch_pending('default')
+        self.assertEqual(
+            trending.top_ids(), [self.quiet.pk, self.popular.pk]
+        )
+
+    def test_score_decays(self):
+        """Событие час назад весит вдвое меньше такого же сейчас."""
+        PostScore.objects.all().delete()
+        now = time.time()
+        trending.record([
+            (self.quiet.pk, 'post', now, 1),
+            (self.popular.pk, 'post', now - 3600, 1),
+        ])
+        scores = dict(PostScore.objects.values_list('post_id', 'score'))
+        self.assertAlmostEqual(
+            scores[self.quiet.pk] - scores[self.popular.pk], math.log(2)
+        )
+
+    def test_record_is_incremental(self):
+        """Добавление событий по одному даёт ту же оценку, что пересчёт."""
+        PostScore.objects.all().delete()
+        now = time.time()
+        events = [
+            (self.popular.pk, 'comment', now - 100, 1),
+            (self.popular.pk, 'view', now - 50, 3),
+            (self.quiet.pk, 'post', now - 7200, 1),
+        ]
+        for event in events:
+            trending.record([event])
+        incremental = dict(PostScore.objects.values_list('post_id', 'score'))
+        with mock.patch.object(trending, '_events', return_value=events):
+            trending.rebuild()
+        rebuilt = dict(PostScore.objects.values_list('post_id', 'score'))
+        for post_id, score in rebuilt.items():
+            self.assertAlmostEqual(incremental[post_id], score)
+
+    def test_rebuild_without_numpy(self):
+        """Пересчёт без numpy совпадает с векторным."""
+        now = time.time()
+        events = [
+            (self.popular.pk, 'comment', now - 100, 1),
+            (self.quiet.pk, 'post', now - 7200, 1),
+        ]
+        expected = trending.compute(events)
+        with mock.patch.object(trending, 'np', None):
+            scores = trending.compute(events)
+        for post_id, score in expected.items():
+            self.assertAlmostEqual(scores[post_id], score)
+
+    def test_index_trending_feed(self):
+        """Лента ?feed=trending показывает посты в порядке популярности."""
+        trending.record([(self.quiet.pk, 'comment', time.time(), 1)])
+        response = self.client.get(
+            reverse('posts:index'), {'feed': 'trending'}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), [self.quiet, self.popular]
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.popular, self.quiet]
+        )
@@ -0,0 +1,95 @@
+"""Тестирование счётчика новых постов ленты подписок."""
+from django.conf import settings
+from django.core.cache import cache
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from core import outbox
+
+from .. import unread
+from ..models import FeedWatermark, Post, User
+from ..sharding import follow, unfollow
+
+
+class UnreadTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        follow(cls.reader.pk, cls.author.pk)
+
+    def setUp(self):
+        cache.clear()
+        outbox.autodiscover()
+        outbox.dispatch_pending('default')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def publish(self, author, count=1):
+        posts = [
+            Post.objects.create(text='Пост', author=author)
+            for _ in range(count)
+        ]
+        outbox.dispatch_pending('default')
+        return posts
+
+    def test_counts_posts_after_watermark(self):
+        """Считаются только посты подписок новее отметки."""
+        self.publish(self.author, 2)
+        self.publish(self.other)
+        self.assertEqual(unread.unread_count(self.reader), 2)
+        self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(FeedWatermark.objects.get().post_id,
+                         Post.objects.filter(author=self.author)[0].pk)
+        self.assertEqual(unread.count(self.reader), 0)
+        self.assertEqual(unread.unread_count(self.reader), 0)
+
+    def test_cached_count_updated_on_fan_out(self):
+        """Новый пост прибавляется к кэшу без подсчёта в базе."""
+        self.assertEqual(unread.unread_count(self.reader), 0)
+        self.publish(self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread.unread_count(self.reader), 1)
+
+    def test_unfollow_resets_count(self):
+        """После отписки счётчик считается заново."""
+        self.publish(self.author)
+        self.assertEqual(unread.unread_count(self.reader), 1)
+        unfollow(self.reader.pk, self.author.pk)
+        outbox.dispatch_pending('default')
+        self.assertEqual(unread.unread_count(self.reader), 0)
+
+    @override_settings(UNREAD_LIMIT=2)
+    def test_badge_in_header(self):
+        """Шапка показывает значок, сверх предела — «2+»."""
+        self.publish(self.author, 3)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response, '<span class="badge bg-danger">2+</span>', html=True
+        )
+        self.client.get(reverse('posts:follow_index'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'badge bg-danger')
+
+
+@override_settings(WRITE_QUEUE_ENABLED=True, REPLICA_DATABASE='default')
+class UnreadPinTest(TransactionTestCase):
+
+    def test_repeated_visit_does_not_pin(self):
+        """Повторный визит без новых постов не закрепляет за основной."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        follow(reader.pk, author.pk)
+        Post.objects.create(text='Пост', author=author)
+        url = reverse('posts:follow_index')
+        self.client.force_login(reader)
+        response = self.client.get(url)
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertTrue(FeedWatermark.objects.exists())
+        del self.client.cookies[settings.REPLICA_PIN_COOKIE]
+        response = self.client.get(url)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
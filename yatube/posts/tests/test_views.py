@@ -1,6 +1,9 @@
 """Тестирование контекста."""
+import json
 import shutil
 import tempfile
+from importlib.util import find_spec
+from unittest import skipUnless
 
 from random import randint
 
@@ -408,3 +411,145 @@ class FollowTest(TestCase):
                 user=self.follower, author=self.follower).count(),
             count_before
         )
+
+
+class FollowBulkViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём читателя и трёх авторов."""
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def post_json(self, data):
+        return self.client.post(
+            reverse('posts:follow_bulk'), json.dumps(data),
+            content_type='application/json'
+        )
+
+    def test_bulk_follow_and_unfollow(self):
+        """Пачка подписок применяется, отсутствующие имена возвращаются."""
+        Follow.objects.create(user=self.reader, author=self.authors[2])
+        response = self.post_json({
+            'follow': ['author_0', 'author_1', 'author_2', 'ghost'],
+            'unfollow': ['author_2'],
+        })
+        self.assertEqual(response.json(), {
+            'followed': ['author_0', 'author_1'],
+            'unfollowed': ['author_2'],
+            'missing': ['ghost'],
+        })
+        self.assertCountEqual(
+            Follow.objects.filter(user=self.reader).values_list(
+                'author__username', flat=True
+            ),
+            ['author_0', 'author_1']
+        )
+
+    def test_bad_requests(self):
+        self.assertEqual(self.post_json(['author_0']).status_code, 400)
+        with self.settings(FOLLOW_BULK_LIMIT=1):
+            response = self.post_json({'follow': ['author_0', 'author_1']})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('posts:follow_bulk'))
+        self.assertEqual(response.status_code, 405)
+
+
+class FollowListViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Автор, его подписчики и одна взаимная подписка."""
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader_{number}')
+            for number in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.readers[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_followers_page(self):
+        """Подписчики выводятся страницами, взаимные отмечены."""
+        with self.settings(FOLLOW_LIST_SIZE=2):
+            response = self.client.get(
+                reverse('posts:profile_followers', args=('author',))
+            )
+            rows = response.context['rows']
+            self.assertEqual(
+                [person.username for person, _ in rows],
+                ['reader_2', 'reader_1']
+            )
+            self.assertContains(response, '?after=')
+            response = self.client.get(
+                reverse('posts:profile_followers', args=('author',)),
+                {'after': response.context['next_cursor']}
+            )
+        self.assertEqual(response.context['rows'], [(self.readers[0], True)])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertContains(response, 'взаимно')
+
+    def test_following_page(self):
+        response = self.client.get(
+            reverse('posts:profile_following', args=('reader_1',))
+        )
+        self.assertEqual(response.context['rows'], [(self.author, False)])
+        response = self.client.get(
+            reverse('posts:profile_following', args=('author',))
+        )
+        self.assertEqual(response.context['rows'], [(self.readers[0], True)])
+
+
+@skipUnless(find_spec('jinja2'), 'Jinja2 не установлен')
+@override_settings(JINJA2_VIEWS={
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index'
+})
+class Jinja2ViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора, группу, пост и подписку."""
+        cls.author = User.objects.create_user(username='Author_1')
+        cls.reader = User.objects.create_user(username='Reader_1')
+        cls.group = Group.objects.create(title='Группа', slug='group_1')
+        cls.post = Post.objects.create(
+            text='Тестовый пост Jinja2',
+            author=cls.author,
+            group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_pages_render_with_jinja2(self):
+        """Страницы ленты, профиля и поста рендерятся через Jinja2."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.id,)),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Тестовый пост Jinja2')
+                self.assertNotIn('{{', response.content.decode())
+                self.assertFalse([
+                    template for template in response.templates
+                    if template.name.startswith('posts/')
+                ])
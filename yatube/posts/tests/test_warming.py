@@ -0,0 +1,40 @@
+"""Тестирование прогрева кэшей."""
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Group, Post, User
+from ..warming import page_paths
+
+
+class WarmCachesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.quiet = User.objects.create_user(username='quiet')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=cls.author, group=cls.group)
+
+    def test_page_paths(self):
+        """Прогреваются главная, группы и профили с постами."""
+        self.assertEqual(page_paths(2, 5), [
+            '/', '/?page=2',
+            '/group/group/', '/group/group/?page=2',
+            '/profile/author/', '/profile/author/?page=2',
+        ])
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_command_fills_index_cache(self):
+        """После прогрева фрагмент главной берётся из кэша."""
+        cache.clear()
+        out = StringIO()
+        call_command('warm_caches', pages=1, threads=1, stdout=out)
+        self.assertIn('Прогрето 3 объектов', out.getvalue())
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get('/')
+        self.assertNotContains(response, 'Новый пост')
@@ -0,0 +1,158 @@
+"""Лента популярного: посты по затухающей со временем активности.
+
+Вклад события веса w в момент t равен w·exp(-(now - t) / tau). Чтобы не
+пересчитывать затухание, хранится log Σ w·exp((t - EPOCH) / tau) с
+фиксированной эпохой: порядок постов от этого не меняется, а новое
+событие просто добавляется через logaddexp. Лучшие TRENDING_SIZE постов
+держатся в кэше списком id, по которому index листает страницы.
+"""
+import math
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Comment, Post, PostLike, PostScore
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOP_KEY = 'trending:top'
+
+
+def tau():
+    return settings.TRENDING_HALF_LIFE / math.log(2)
+
+
+def log_weight(kind, timestamp, count=1):
+    """Логарифм вклада count событий в оценку с фиксированной эпохой."""
+    return (math.log(settings.TRENDING_WEIGHTS[kind] * count)
+            + (timestamp - settings.TRENDING_EPOCH) / tau())
+
+
+def record(events):
+    """Добавляет события (post_id, вид, unix-время, число) к оценкам."""
+    increments = defaultdict(lambda: -math.inf)
+    for post_id, kind, timestamp, count in events:
+        if count <= 0:
+            continue
+        increments[post_id] = logaddexp(
+            increments[post_id], log_weight(kind, timestamp, count)
+        )
+    if not increments:
+        return
+    with transaction.atomic():
+        scores = PostScore.objects.in_bulk(list(increments))
+        for post_id, score in scores.items():
+            score.score = logaddexp(score.score, increments.pop(post_id))
+        PostScore.objects.bulk_update(scores.values(), ['score'])
+        existing = set(Post.objects.filter(
+            pk__in=list(increments)
+        ).values_list('pk', flat=True))
+        PostScore.objects.bulk_create([
+            PostScore(post_id=post_id, score=score)
+            for post_id, score in increments.items() if post_id in existing
+        ], ignore_conflicts=True)
+    refresh_top()
+
+
+def logaddexp(a, b):
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def refresh_top():
+    """Пересобирает закэшированный список лучших постов по индексу."""
+    top = list(PostScore.objects.order_by('-score').values_list(
+        'post_id', flat=True
+    )[:settings.TRENDING_SIZE])
+    cache.set(TOP_KEY, top, None)
+    return top
+
+
+def top_ids():
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = refresh_top()
+    return top
+
+
+def _events():
+    """Все события для пересчёта: (post_id, вид, unix-время, число).
+
+    Время просмотров не хранится, поэтому при пересчёте они считаются
+    сделанными в момент публикации: старый пост пересчёт не поднимет.
+    """
+    for post_id, created, views in Post.objects.values_list(
+        'pk', 'pub_date', 'views'
+    ):
+        yield post_id, 'post', created.timestamp(), 1
+        if views:
+            yield post_id, 'view', created.timestamp(), views
+    for post_id, created in Comment.objects.filter(
+        post__isnull=False
+    ).values_list('post_id', 'created'):
+        yield post_id, 'comment', created.timestamp(), 1
+    for post_id, created in PostLike.objects.values_list(
+        'post_id', 'created'
+    ):
+        yield post_id, 'like', created.timestamp(), 1
+
+
+def compute(events):
+    """Оценки {post_id: score} по всем событиям сразу.
+
+    Все вклады сдвигаются на текущий момент, поэтому экспоненты не
+    переполняются, и суммируются одним проходом bincount.
+    """
+    now = time.time()
+    shift = (now - settings.TRENDING_EPOCH) / tau()
+    if np is not None:
+        rows = np.array([
+            (post_id, settings.TRENDING_WEIGHTS[kind] * count, timestamp)
+            for post_id, kind, timestamp, count in events
+        ], dtype=np.float64).reshape(-1, 3)
+        post_ids, index = np.unique(
+            rows[:, 0].astype(np.int64), return_inverse=True
+        )
+        totals = np.bincount(
+            index, weights=rows[:, 1] * np.exp((rows[:, 2] - now) / tau())
+        )
+        with np.errstate(divide='ignore'):
+            scores = np.log(totals) + shift
+        return dict(zip(post_ids.tolist(), scores.tolist()))
+    totals = defaultdict(float)
+    for post_id, kind, timestamp, count in events:
+        weight = settings.TRENDING_WEIGHTS[kind] * count
+        totals[post_id] += weight * math.exp((timestamp - now) / tau())
+    return {
+        post_id: (math.log(total) if total else -math.inf) + shift
+        for post_id, total in totals.items()
+    }
+
+
+def rebuild():
+    """Пересчитывает все оценки заново и возвращает их число.
+
+    Только для ручного восстановления (команда rebuild_trending):
+    просмотры здесь приписаны моменту публикации, поэтому пересчёт
+    теряет их время, которое учитывал record, и опускает старые посты,
+    которые смотрят сейчас.
+    """
+    scores = compute(_events())
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create([
+            PostScore(post_id=post_id, score=score)
+            for post_id, score in scores.items() if score != -math.inf
+        ], batch_size=500)
+    refresh_top()
+    return len(scores)
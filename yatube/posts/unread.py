@@ -0,0 +1,93 @@
+"""Новые посты в ленте подписок.
+
+У пользователя хранится отметка (pub_date, id) последнего увиденного
+поста ленты — FeedWatermark, она сдвигается при открытии первой
+страницы follow_index. Число непрочитанных — подсчёт постов ленты
+новее отметки по индексу pub_date, не больше UNREAD_LIMIT + 1. Оно
+кэшируется на UNREAD_CACHE_TIME: новый пост автора прибавляет единицу
+к закэшированным счётчикам подписчиков, подписка и отписка сбрасывают
+кэш, поэтому шапка обычно обходится одним чтением кэша.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import FeedWatermark, Post
+from .sharding import feed_filter
+
+
+def _key(user_id):
+    return f'unread:{user_id}'
+
+
+def watermark(user):
+    """Пара (pub_date, id) последнего увиденного поста ленты.
+
+    До первого открытия ленты — момент регистрации.
+    """
+    row = FeedWatermark.objects.filter(user_id=user.id).values_list(
+        'pub_date', 'post_id'
+    ).first()
+    return row or (user.date_joined, 0)
+
+
+def newer_than(pub_date, post_id):
+    return Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=post_id)
+
+
+def count(user):
+    """Число постов ленты новее отметки, не больше UNREAD_LIMIT + 1."""
+    posts = Post.objects.filter(feed_filter(user.id)).filter(
+        newer_than(*watermark(user))
+    ).order_by()
+    return posts[:settings.UNREAD_LIMIT + 1].count()
+
+
+def unread_count(user):
+    key = _key(user.id)
+    unread = cache.get(key)
+    if unread is None:
+        unread = count(user)
+        cache.set(key, unread, settings.UNREAD_CACHE_TIME)
+    return unread
+
+
+def label(unread):
+    """Текст значка: '' без новых, '99+' сверх UNREAD_LIMIT."""
+    if not unread:
+        return ''
+    if unread > settings.UNREAD_LIMIT:
+        return f'{settings.UNREAD_LIMIT}+'
+    return str(unread)
+
+
+def is_unseen(user, post):
+    """Новее ли post отметки пользователя."""
+    return (post.pub_date, post.pk) > watermark(user)
+
+
+def mark_seen(user, post):
+    """Сдвигает отметку пользователя до post. True, если она сдвинулась."""
+    if not is_unseen(user, post):
+        return False
+    FeedWatermark.objects.update_or_create(
+        user_id=user.id,
+        defaults={'pub_date': post.pub_date, 'post_id': post.pk}
+    )
+    cache.set(_key(user.id), 0, settings.UNREAD_CACHE_TIME)
+    return True
+
+
+def bump(user_ids):
+    """Прибавляет новый пост к закэшированным счётчикам."""
+    keys = [_key(user_id) for user_id in user_ids]
+    cached = cache.get_many(keys)
+    if cached:
+        cache.set_many(
+            {key: unread + 1 for key, unread in cached.items()},
+            settings.UNREAD_CACHE_TIME
+        )
+
+
+def invalidate(user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -17,8 +17,36 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/like/', views.post_like, name='post_like'
+    ),
+    path(
+        'posts/<int:post_id>/unlike/', views.post_unlike, name='post_unlike'
+    ),
+    path(
+        'comments/<int:comment_id>/like/',
+        views.comment_like,
+        name='comment_like'
+    ),
+    path(
+        'comments/<int:comment_id>/unlike/',
+        views.comment_unlike,
+        name='comment_unlike'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/followers/',
+        views.profile_followers,
+        name='profile_followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.profile_following,
+        name='profile_following'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('new/', views.feed_delta, name='feed_delta'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -3,6 +3,7 @@ from django.db.models import QuerySet
 from django.http import HttpRequest
 
 from django.conf import settings
+from django.template import engines
 
 
 def get_paginator(request: HttpRequest, posts: QuerySet) -> Page:
@@ -10,3 +11,10 @@ def get_paginator(request: HttpRequest, posts: QuerySet) -> Page:
     paginator = Paginator(posts, settings.QTY_POSTS)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def template_engine(view_name: str):
+    """Движок шаблонов для view: 'jinja2', если он включён для неё."""
+    if view_name in settings.JINJA2_VIEWS and 'jinja2' in engines:
+        return 'jinja2'
+    return None
@@ -1,10 +1,87 @@
+import json
+
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 from django.shortcuts import redirect, render, get_object_or_404
+from django.urls import reverse
 from django.conf import settings
 
+from core import replica
+from core.writer import run_write
+
+from . import delta, trending, unread
+from .counters import post_views
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Comment, Follow
-from .utils import get_paginator
+from .likes import like, liked, unlike
+from .lookups import group_by_slug, user_by_username
+from .models import Comment, Post, User
+from .recommendations import recommended_authors
+from .sharding import (
+    feed_filter, follow, follow_many, following_ids, follows_back,
+    follows_page, is_following, unfollow, unfollow_many
+)
+from .tasks import make_thumbnails
+from .utils import get_paginator, template_engine
+
+
+def feed_url(request):
+    """Адрес ленты без параметров фрагмента: сюда ведёт ?next= лайков."""
+    query = request.GET.copy()
+    for name in ('fragment', 'cursor'):
+        query.pop(name, None)
+    if not query:
+        return request.path
+    return f'{request.path}?{query.urlencode()}'
+
+
+def render_cards(request, posts, next_cursor=None, show_group_link=True,
+                 next_url=None):
+    """Только карточки постов, без base.html: для подгрузки ленты.
+
+    Неизменная часть карточки кэшируется по id поста. next_url — страница
+    ленты, куда вернуться после лайка, а не адрес самого фрагмента.
+    """
+    response = render(request, 'posts/includes/post_cards.html', {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'show_group_link': show_group_link,
+        'next_url': next_url or feed_url(request),
+        'liked_posts': liked('post', request.user, posts),
+        'card_cache_time': settings.POST_CARD_CACHE_TIME,
+    })
+    response['X-Next-Cursor'] = next_cursor or ''
+    return response
+
+
+def feed_fragment(request, posts, show_group_link=True):
+    """Следующая порция ленты после ?cursor= для бесконечной прокрутки."""
+    cursor = request.GET.get('cursor')
+    parsed = delta.parse_cursor(cursor)
+    if cursor and parsed is None:
+        return JsonResponse({'error': 'Неверный курсор.'}, status=400)
+    page, next_cursor = delta.before(
+        posts.select_related('author', 'group'), parsed, settings.QTY_POSTS
+    )
+    return render_cards(request, page, next_cursor, show_group_link)
+
+
+def trending_fragment(request):
+    """Порция ленты популярного: курсор — позиция в списке лучших."""
+    cursor = request.GET.get('cursor') or '0'
+    if not cursor.isdigit():
+        return JsonResponse({'error': 'Неверный курсор.'}, status=400)
+    start = int(cursor)
+    top = trending.top_ids()
+    ids = top[start:start + settings.QTY_POSTS]
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    end = start + settings.QTY_POSTS
+    return render_cards(
+        request, [posts[pk] for pk in ids if pk in posts],
+        str(end) if end < len(top) else None
+    )
 
 
 def index(request):
@@ -13,21 +90,44 @@ def index(request):
     и передаются в словаре context под ключом 'posts'
     в шаблон posts/index.html.
     """
-    posts = Post.objects.select_related(
-        'author', 'group')
-
-    page_obj = get_paginator(request, posts)
+    feed = request.GET.get('feed')
+    if request.GET.get('fragment'):
+        if feed == 'trending':
+            return trending_fragment(request)
+        return feed_fragment(request, Post.objects.all())
+    if feed == 'trending':
+        page_obj = get_paginator(request, trending.top_ids())
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            page_obj.object_list
+        )
+        page_obj.object_list = [
+            posts[pk] for pk in page_obj.object_list if pk in posts
+        ]
+    else:
+        feed = None
+        posts = Post.objects.select_related(
+            'author', 'group')
+        page_obj = get_paginator(request, posts)
 
     context = {
         'page_obj': page_obj,
+        'feed': feed,
+        'liked_posts': liked('post', request.user, page_obj.object_list),
         'cache_time': settings.CACHE_TIME_SEC
     }
-    return render(request, 'posts/index.html', context)
+    return render(
+        request, 'posts/index.html', context,
+        using=template_engine('index')
+    )
 
 
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
+    group = group_by_slug.get_or_404(slug)
+    if request.GET.get('fragment'):
+        return feed_fragment(
+            request, group.group_posts.all(), show_group_link=False
+        )
     posts = group.group_posts.select_related(
         'author', 'group')
 
@@ -36,41 +136,65 @@ def group_posts(request, slug):
     context = {
         'group': group,
         'page_obj': page_obj,
+        'liked_posts': liked('post', request.user, page_obj.object_list),
     }
 
-    return render(request, template, context)
+    return render(
+        request, template, context, using=template_engine('group_posts')
+    )
 
 
 def profile(request, username):
     """Страница автора."""
-    author = get_object_or_404(User, username=username)
+    author = user_by_username.get_or_404(username)
+    if request.GET.get('fragment'):
+        return feed_fragment(request, author.posts.all())
     posts = author.posts.select_related('group')
 
     page_obj = get_paginator(request, posts)
 
     following = (request.user.is_authenticated
-                 and request.user.follower.filter(author=author).exists())
+                 and is_following(request.user.id, author.id))
 
     context = {
         'author': author,
         'page_obj': page_obj,
+        'liked_posts': liked('post', request.user, page_obj.object_list),
         'following': following,
+        'recommendations': [
+            person for person in recommended_authors(request.user.id)
+            if person.id != author.id
+        ] if request.user.is_authenticated else [],
     }
 
-    return render(request, 'posts/profile.html', context)
+    return render(
+        request, 'posts/profile.html', context,
+        using=template_engine('profile')
+    )
 
 
 def post_detail(request, post_id):
     """Подробная информация поста."""
     post = get_object_or_404(Post, id=post_id)
+    post_views.add(post.pk)
     comments = Comment.objects.filter(post_id=post_id).order_by('-created')
     form_comments = CommentForm(request.POST or None)
     context = {
         'post': post,
+        'views': post_views.value(post),
         'comments': comments,
+        'liked_posts': liked('post', request.user, [post]),
+        'liked_comments': liked('comment', request.user, comments),
+        'comment_stream_url': (
+            f'{settings.SSE_URL_PREFIX}posts/{post.pk}/comments/'
+            if settings.SSE_ENABLED else None
+        ),
         'form': form_comments
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(
+        request, 'posts/post_detail.html', context,
+        using=template_engine('post_detail')
+    )
 
 
 @login_required
@@ -79,7 +203,10 @@ def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        post = run_write(form.save)
+        replica.mark_write()
+        if post.image:
+            make_thumbnails.delay(post.pk)
         return redirect('posts:profile', username=request.user.username)
     context = {
         'form': form,
@@ -102,6 +229,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if post.image and 'image' in form.changed_data:
+            make_thumbnails.delay(post.pk)
         return redirect('posts:post_detail', post_id=post_id)
 
     context = {
@@ -122,41 +251,147 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        form.save()
+        run_write(form.save)
+        replica.mark_write()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def _like_redirect(request, post_id):
+    """Назад на страницу из ?next= или на страницу поста."""
+    next_url = request.GET.get('next')
+    if next_url and is_safe_url(
+        next_url, allowed_hosts={request.get_host()},
+        require_https=request.is_secure()
+    ):
+        return redirect(next_url)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+@require_POST
+def post_like(request, post_id):
+    """Поставить лайк посту."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    if run_write(like, 'post', request.user.id, post.pk):
+        replica.mark_write()
+    return _like_redirect(request, post.pk)
+
+
+@login_required
+@require_POST
+def post_unlike(request, post_id):
+    """Снять лайк с поста."""
+    if run_write(unlike, 'post', request.user.id, post_id):
+        replica.mark_write()
+    return _like_redirect(request, post_id)
+
+
+@login_required
+@require_POST
+def comment_like(request, comment_id):
+    """Поставить лайк комментарию."""
+    comment = get_object_or_404(
+        Comment.objects.only('pk', 'post_id'), pk=comment_id
+    )
+    if run_write(like, 'comment', request.user.id, comment.pk):
+        replica.mark_write()
+    return _like_redirect(request, comment.post_id)
+
+
+@login_required
+@require_POST
+def comment_unlike(request, comment_id):
+    """Снять лайк с комментария."""
+    comment = get_object_or_404(
+        Comment.objects.only('pk', 'post_id'), pk=comment_id
+    )
+    if run_write(unlike, 'comment', request.user.id, comment.pk):
+        replica.mark_write()
+    return _like_redirect(request, comment.post_id)
+
+
+def feed_delta(request):
+    """Посты новее ?cursor= для опроса ленты: HTML-фрагмент или JSON.
+
+    ?feed=follow — только подписки. Если нового нет, ответ 304 без тела.
+    Курсор для следующего опроса и has_more в JSON передаются в теле,
+    для HTML — в заголовках X-Feed-Cursor и X-Feed-Has-More.
+    """
+    cursor = request.GET.get('cursor')
+    parsed = delta.parse_cursor(cursor)
+    if cursor and parsed is None:
+        return JsonResponse({'error': 'Неверный курсор.'}, status=400)
+    posts = Post.objects.all()
+    if request.GET.get('feed') == 'follow':
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Нужен вход.'}, status=403)
+        posts = posts.filter(feed_filter(request.user.id))
+    new_posts, has_more = delta.since(
+        posts, parsed, settings.FEED_DELTA_LIMIT
+    )
+    if parsed is not None and not new_posts:
+        return HttpResponseNotModified()
+    if new_posts:
+        cursor = delta.make_cursor(new_posts[0].pub_date, new_posts[0].pk)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'cursor': cursor,
+            'has_more': has_more,
+            'posts': [{
+                'id': post.pk,
+                'author': post.author.username,
+                'group': post.group.slug if post.group else None,
+                'text': post.text,
+                'pub_date': post.pub_date.isoformat(),
+                'url': post.get_absolute_url(),
+            } for post in new_posts],
+        })
+    response = render_cards(request, new_posts, next_url=reverse(
+        'posts:follow_index' if request.GET.get('feed') == 'follow'
+        else 'posts:index'
+    ))
+    response['X-Feed-Cursor'] = cursor or ''
+    response['X-Feed-Has-More'] = 'true' if has_more else 'false'
+    return response
+
+
 @login_required
 def follow_index(request):
     """Страница с постами авторов, на которых подписан текущий пользователь."""
-    posts_follow = Post.objects.filter(author__following__user=request.user)
+    posts_follow = Post.objects.filter(feed_filter(request.user.id))
+    if request.GET.get('fragment'):
+        return feed_fragment(request, posts_follow)
     page_obj = get_paginator(request, posts_follow)
+    if page_obj.number == 1 and page_obj.object_list:
+        newest = page_obj[0]
+        # Отметка сверяется здесь же: повторный визит ничего не пишет и
+        # не закрепляет пользователя за основной базой.
+        if (unread.is_unseen(request.user, newest)
+                and run_write(unread.mark_seen, request.user, newest)):
+            replica.mark_write()
     context = {
         'title': 'Мои подписки',
         'page_obj': page_obj,
+        'liked_posts': liked('post', request.user, page_obj.object_list),
+        'recommendations': recommended_authors(request.user.id),
     }
-    return render(request, 'posts/follow.html', context)
+    return render(
+        request, 'posts/follow.html', context,
+        using=template_engine('follow_index')
+    )
 
 
 @login_required
 def profile_follow(request, username):
     """Подписаться на автора."""
-    author = get_object_or_404(User, username=username)
+    author = user_by_username.get_or_404(username)
     if author == request.user:
         return redirect(
             'posts:profile',
             username=username
         )
-    follower = Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
-    if follower is True:
-        return redirect(
-            'posts:profile',
-            username=username
-        )
-    Follow.objects.create(user=request.user, author=author)
+    if run_write(follow, request.user.id, author.id):
+        replica.mark_write()
     return redirect(
         'posts:profile',
         username=username
@@ -166,6 +401,95 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     """Дизлайк, отписка."""
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    author = user_by_username.get_or_404(username)
+    if run_write(unfollow, request.user.id, author.id):
+        replica.mark_write()
     return redirect('posts:profile', username=username)
+
+
+def profile_followers(request, username):
+    """Подписчики автора; взаимные отмечаются."""
+    author = user_by_username.get_or_404(username)
+    follows, next_cursor = follows_page(
+        request.GET.get('after'), settings.FOLLOW_LIST_SIZE,
+        author_id=author.id
+    )
+    mutual = following_ids(author.id)
+    return render_follow_list(
+        request, author, [follow.user_id for follow in follows],
+        mutual, next_cursor, 'Подписчики'
+    )
+
+
+def profile_following(request, username):
+    """Авторы, на которых подписан пользователь; взаимные отмечаются."""
+    author = user_by_username.get_or_404(username)
+    follows, next_cursor = follows_page(
+        request.GET.get('after'), settings.FOLLOW_LIST_SIZE,
+        user_id=author.id
+    )
+    ids = [follow.author_id for follow in follows]
+    return render_follow_list(
+        request, author, ids, follows_back(author.id, ids), next_cursor,
+        'Подписки'
+    )
+
+
+def render_follow_list(request, author, ids, mutual, next_cursor, title):
+    users = User.objects.in_bulk(ids)
+    context = {
+        'author': author,
+        'title': title,
+        'rows': [
+            (users[user_id], user_id in mutual)
+            for user_id in ids if user_id in users
+        ],
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Пачка подписок и отписок одним запросом.
+
+    Тело: {"follow": [username, ...], "unfollow": [username, ...]}.
+    """
+    try:
+        data = json.loads(request.body)
+        names = {
+            action: list(map(str, data.get(action, [])))
+            for action in ('follow', 'unfollow')
+        }
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Ожидается JSON-объект.'}, status=400)
+    if sum(map(len, names.values())) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse({
+            'error': f'Не больше {settings.FOLLOW_BULK_LIMIT} имён.'
+        }, status=400)
+    ids = dict(User.objects.filter(
+        username__in=names['follow'] + names['unfollow']
+    ).values_list('username', 'id'))
+    usernames = {user_id: username for username, user_id in ids.items()}
+
+    def apply():
+        with transaction.atomic():
+            followed = follow_many(request.user.id, [
+                ids[name] for name in names['follow'] if name in ids
+            ])
+            unfollowed = unfollow_many(request.user.id, [
+                ids[name] for name in names['unfollow'] if name in ids
+            ])
+        return followed, unfollowed
+
+    followed, unfollowed = run_write(apply)
+    if followed or unfollowed:
+        replica.mark_write()
+    return JsonResponse({
+        'followed': [usernames[user_id] for user_id in followed],
+        'unfollowed': [usernames[user_id] for user_id in unfollowed],
+        'missing': sorted(
+            set(names['follow'] + names['unfollow']) - set(ids)
+        ),
+    })
@@ -0,0 +1,146 @@
+"""Прогрев кэшей после деплоя или сброса: страницы и миниатюры.
+
+Страницы рендерятся через полный стек middleware в этом процессе либо,
+если задан base_url, запрашиваются по HTTP у работающего сервера: так
+прогревается и его локальный кэш.
+"""
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.base import BaseHandler
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+
+from core.fast_urls import fast_reverse
+
+from .models import Group, Post, User
+from .tasks import make_post_thumbnails
+
+
+def page_paths(pages, profiles):
+    """Адреса первых pages страниц главной, групп и популярных профилей.
+
+    Посещения профилей не учитываются, поэтому популярность оценивается
+    по числу постов автора.
+    """
+    bases = [fast_reverse('posts:index')]
+    bases.extend(
+        fast_reverse('posts:group_list', slug)
+        for slug in Group.objects.values_list('slug', flat=True)
+    )
+    bases.extend(
+        fast_reverse('posts:profile', username)
+        for username in User.objects.annotate(
+            posts_count=Count('posts')
+        ).filter(posts_count__gt=0).order_by(
+            '-posts_count'
+        ).values_list('username', flat=True)[:profiles]
+    )
+    return [
+        base if page == 1 else f'{base}?page={page}'
+        for base in bases
+        for page in range(1, pages + 1)
+    ]
+
+
+def thumbnail_posts(pages, profiles):
+    """Посты с картинками, попадающие на прогреваемые страницы."""
+    limit = pages * settings.QTY_POSTS
+    with_image = Post.objects.exclude(image='')
+    posts = {post.pk: post for post in with_image[:limit]}
+    for group_id in Group.objects.values_list('pk', flat=True):
+        posts.update(
+            (post.pk, post)
+            for post in with_image.filter(group_id=group_id)[:limit]
+        )
+    authors = User.objects.annotate(posts_count=Count('posts')).filter(
+        posts_count__gt=0
+    ).order_by('-posts_count').values_list('pk', flat=True)[:profiles]
+    for author_id in authors:
+        posts.update(
+            (post.pk, post)
+            for post in with_image.filter(author_id=author_id)[:limit]
+        )
+    return list(posts.values())
+
+
+class LocalRenderer:
+    """Рендерит страницы анонимными запросами через middleware."""
+
+    def __init__(self):
+        self.handler = BaseHandler()
+        self.handler.load_middleware()
+        self.factory = RequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+
+    def __call__(self, path):
+        request = self.factory.get(path)
+        request.user = AnonymousUser()
+        return self.handler.get_response(request).status_code
+
+
+class HttpRenderer:
+    """Запрашивает страницы у работающего сервера."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def __call__(self, path):
+        return requests.get(self.base_url + path, timeout=30).status_code
+
+
+def thumbnails(post):
+    make_post_thumbnails(post)
+    return 'ok'
+
+
+def timed(func, item):
+    started = time.perf_counter()
+    try:
+        return func(item), time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def report(progress, kind, name, get_result):
+    try:
+        result, seconds = get_result()
+    except Exception as exc:
+        result, seconds = repr(exc), 0.0
+    if progress is not None:
+        progress(kind, name, result, seconds)
+
+
+def warm(pages, profiles, threads, base_url='', progress=None):
+    """Прогревает страницы и миниатюры в threads потоков.
+
+    progress(kind, name, result, seconds) вызывается после каждого шага.
+    Возвращает общее время в секундах.
+    """
+    started = time.perf_counter()
+    render = HttpRenderer(base_url) if base_url else LocalRenderer()
+
+    jobs = [
+        (render, path, 'page', path)
+        for path in page_paths(pages, profiles)
+    ]
+    jobs.extend(
+        (thumbnails, post, 'thumbnail', post.image)
+        for post in thumbnail_posts(pages, profiles)
+    )
+    if threads > 1:
+        with ThreadPoolExecutor(threads) as pool:
+            futures = {
+                pool.submit(timed, func, item): (kind, name)
+                for func, item, kind, name in jobs
+            }
+            for future in as_completed(futures):
+                report(progress, *futures[future], future.result)
+    else:
+        for func, item, kind, name in jobs:
+            report(progress, kind, name, partial(timed, func, item))
+    return time.perf_counter() - started
@@ -0,0 +1,47 @@
+// Новые комментарии на странице поста по Server-Sent Events.
+// Адрес потока — в data-stream-url у тега script, см. posts/streams.py.
+(function () {
+  var script = document.currentScript;
+  var list = document.getElementById('comments');
+  if (!window.EventSource || !script || !list) {
+    return;
+  }
+  var latest = list.querySelector('[data-comment-id]');
+  // Комментарии новее последнего на странице: и те, что появились,
+  // пока она загружалась.
+  var url = script.dataset.streamUrl + '?after=' +
+    (latest ? latest.dataset.commentId : 0);
+
+  function element(tag, className, text) {
+    var node = document.createElement(tag);
+    if (className) {
+      node.className = className;
+    }
+    if (text) {
+      node.textContent = text;
+    }
+    return node;
+  }
+
+  var source = new EventSource(url);
+  source.addEventListener('comment', function (event) {
+    var comment = JSON.parse(event.data);
+    if (list.querySelector('[data-comment-id="' + comment.id + '"]')) {
+      return;
+    }
+    var item = element('div', 'media mb-4');
+    item.dataset.commentId = comment.id;
+    var body = element('div', 'media-body');
+    var title = element('h5', 'mt-0');
+    var link = element('a', '', comment.author_name || comment.author);
+    link.href = comment.author_url;
+    title.appendChild(link);
+    body.appendChild(title);
+    body.appendChild(element('p', '', comment.text));
+    var meta = element('div', 'text-muted');
+    meta.appendChild(element('small', '', comment.created));
+    item.appendChild(body);
+    item.appendChild(meta);
+    list.insertBefore(item, list.firstChild);
+  });
+})();
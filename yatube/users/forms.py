@@ -1,10 +1,36 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from .tasks import send_password_reset
+
 User = get_user_model()
 
+# Ключи контекста письма, которые задача строит сама.
+SECRET_CONTEXT = {'user', 'uid', 'token'}
+
 
 class CreationForm(UserCreationForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо собирает и отправляет фоновая задача.
+
+    В очередь попадают только id пользователя и открытая часть контекста:
+    токен для ссылки задача создаёт сама.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        send_password_reset.delay(
+            context['user'].pk,
+            {
+                key: value for key, value in context.items()
+                if key not in SECRET_CONTEXT
+            },
+            subject_template_name, email_template_name, from_email,
+            html_email_template_name
+        )
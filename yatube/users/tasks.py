@@ -0,0 +1,36 @@
+"""Фоновые задачи пользователей."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.taskqueue import task
+
+User = get_user_model()
+
+
+@task(priority=10)
+def send_password_reset(user_id, context, subject_template_name,
+                        email_template_name, from_email,
+                        html_email_template_name=None):
+    """Собирает и отправляет письмо для сброса пароля.
+
+    Токен создаётся здесь, поэтому ссылка из письма не хранится в
+    строке задачи.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    to_email = getattr(user, User.get_email_field_name())
+    context = dict(
+        context,
+        email=to_email,
+        user=user,
+        uid=urlsafe_base64_encode(force_bytes(user.pk)),
+        token=default_token_generator.make_token(user),
+    )
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context, from_email,
+        to_email, html_email_template_name
+    )
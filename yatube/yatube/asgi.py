@@ -0,0 +1,47 @@
+"""
+ASGI config for yatube project: долгие соединения Server-Sent Events.
+
+Django 2.2 не обслуживает запросы через ASGI, поэтому здесь только
+потоки событий, а страницы по-прежнему отдаёт WSGI (yatube/wsgi.py).
+Запуск любым ASGI-сервером, например::
+
+    uvicorn yatube.asgi:application --port 8001
+
+Фронтенд-сервер проксирует сюда пути SSE_URL_PREFIX без буферизации.
+"""
+
+import os
+import re
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from posts.streams import comment_stream, not_found  # noqa: E402
+
+ROUTES = [
+    (re.compile(rf'^{re.escape(settings.SSE_URL_PREFIX)}'
+                r'posts/(?P<post_id>\d+)/comments/$'), comment_stream),
+]
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    for pattern, handler in ROUTES:
+        match = pattern.match(scope['path'])
+        if match and scope['method'] == 'GET':
+            await handler(scope, receive, send, int(match['post_id']))
+            return
+    await not_found(send)
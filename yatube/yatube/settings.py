@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -32,6 +33,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.replica.ReplicaMiddleware',
+    'core.middleware.writer.WriteTimeoutMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -39,6 +42,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.profiler.SamplingProfilerMiddleware',
+    'core.middleware.template_profiler.TemplateProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -56,20 +61,165 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.following',
+                'posts.context_processors.unread_posts',
             ],
         },
     },
 ]
 
+# Необязательный движок Jinja2 для горячих шаблонов ленты.
+JINJA2_TEMPLATES_DIR = os.path.join(BASE_DIR, 'jinja2')
+if find_spec('jinja2') is not None:
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'NAME': 'jinja2',
+        'DIRS': [JINJA2_TEMPLATES_DIR],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'core.jinja2_env.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+                'posts.context_processors.following',
+                'posts.context_processors.unread_posts',
+            ],
+        },
+    })
+
+# Имена view, которые рендерятся через Jinja2, например {'index', 'profile'}.
+JINJA2_VIEWS = set()
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
+DATABASE_ROUTERS = [
+    'posts.routers.FollowShardRouter',
+    'core.routers.ReplicaRouter',
+]
+
+# Базы с подписками, см. posts/sharding.py. Перед изменением списка
+# закрепите пользователей: manage.py rebalance_follow_shards --pin-current
+FOLLOW_SHARDS = ['default']
+FOLLOW_SHARD_MAP_CACHE_TIME = 60
+# Кэш множества подписок пользователя, см. posts.sharding.following_ids.
+FOLLOWING_CACHE_TIME = 60 * 60
+# Сколько имён можно передать в posts:follow_bulk за раз.
+FOLLOW_BULK_LIMIT = 500
+# Размер страницы списков подписчиков и подписок.
+FOLLOW_LIST_SIZE = 30
+
+# Значок новых постов ленты подписок, см. posts/unread.py.
+UNREAD_LIMIT = 99
+UNREAD_CACHE_TIME = 5 * 60
+
+# Опрос новых постов posts:feed_delta, см. posts/delta.py.
+FEED_DELTA_LIMIT = 50
+FEED_DELTA_LATEST_CACHE_TIME = 60
+
+# Поток новых комментариев по SSE через yatube/asgi.py, см.
+# posts/streams.py. Без ASGI-сервера (SSE_ENABLED = False) страница поста
+# к потоку не подключается.
+SSE_ENABLED = False
+SSE_URL_PREFIX = '/stream/'
+SSE_POLL_INTERVAL = 1
+SSE_KEEPALIVE = 15
+SSE_RETRY = 3
+SSE_REPLAY_LIMIT = 100
+
+# Кэш неизменной части карточки поста во фрагментах ленты (?fragment=1).
+POST_CARD_CACHE_TIME = 10 * 60
+
+# Рекомендации авторов, см. posts/recommendations.py.
+RECOMMENDATIONS_TOP_K = 20
+RECOMMENDATIONS_NEIGHBOURS = 50
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_CACHE_TIME = 60 * 60
+
+# Лента популярного, см. posts/trending.py. Оценки считаются от эпохи
+# TRENDING_EPOCH (unix-время), вклад события вдвое падает за HALF_LIFE.
+TRENDING_EPOCH = 1640995200
+TRENDING_HALF_LIFE = 12 * 60 * 60
+TRENDING_WEIGHTS = {'post': 1.0, 'comment': 2.0, 'like': 0.5, 'view': 0.1}
+TRENDING_SIZE = 200
+
+# Реплика для чтения включается, если в DATABASES есть REPLICA_DATABASE.
+REPLICA_DATABASE = 'replica'
+REPLICA_PRIMARY_DATABASE = 'default'
+REPLICA_VIEWS = {
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+}
+REPLICA_SNAPSHOT_INTERVAL = 10
+REPLICA_PIN_SECONDS = 3 * REPLICA_SNAPSHOT_INTERVAL
+REPLICA_PIN_COOKIE = 'replica_pin'
+REPLICA_BACKUP_PAGES = -1
+
+# Применяются к каждому новому соединению SQLite, см. core/db.py.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
+}
+
+# Транзакционный outbox, см. core/outbox.py.
+OUTBOX_BATCH_SIZE = 200
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_DELAY = 1
+OUTBOX_MAX_RETRY_DELAY = 600
+OUTBOX_POLL_INTERVAL = 1
+OUTBOX_RETENTION = 24 * 60 * 60
+
+# Очередь фоновых задач, см. core/taskqueue.py. При TASKS_EAGER задачи
+# выполняются сразу, без воркера runworker.
+TASKS_EAGER = True
+TASKS_WORKERS = 4
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 5
+TASKS_MAX_RETRY_DELAY = 60 * 60
+TASKS_VISIBILITY_TIMEOUT = 5 * 60
+TASKS_POLL_INTERVAL = 1
+TASKS_RETENTION = 7 * 24 * 60 * 60
+# Имя задачи: интервал запуска в секундах.
+TASKS_PERIODIC = {}
+
+# Прогрев кэшей командой warm_caches, см. posts/warming.py.
+WARM_CACHES_PAGES = 3
+WARM_CACHES_PROFILES = 20
+WARM_CACHES_THREADS = 4
+WARM_CACHES_BASE_URL = ''
+
+# Запись через один поток-писатель пачками, см. core/writer.py.
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_BATCH_SIZE = 50
+WRITE_QUEUE_BATCH_WAIT = 0.002
+WRITE_QUEUE_TIMEOUT = 30
+# Файл блокировки, по которой чередуются писатели процессов; '' — без неё.
+WRITE_QUEUE_LOCK_FILE = ''
+# Retry-After ответа 503, если запись не дождалась очереди.
+WRITE_QUEUE_RETRY_AFTER = 5
+
+# Буферизованные счётчики, см. core/counters.py. Выключенный буфер пишет
+# каждое приращение сразу.
+COUNTERS_ENABLED = False
+COUNTERS_FLUSH_INTERVAL = 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -101,6 +251,11 @@ FIRST_CHARS_POST = 15
 
 CACHE_TIME_SEC = 20
 
+# Кэш поиска групп и пользователей, см. posts/lookups.py.
+LOOKUP_CACHE_TIME = 10 * 60
+LOOKUP_NEGATIVE_CACHE_TIME = 30
+LOOKUP_MISSES_CACHE = 'lookup_misses'
+
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_URL = '/static/'
 
@@ -117,11 +272,27 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'lookup_misses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lookup-misses',
+    },
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 INTERNAL_IPS = [
     '127.0.0.1',
-]
\ No newline at end of file
+]
+
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_SAMPLE_INTERVAL = 0.005
+PROFILER_TRIGGER_HEADER = 'HTTP_X_PROFILE'
+PROFILER_TRIGGER_PARAM = 'profile'
+PROFILER_MAX_CAPTURES = 50
+
+TEMPLATE_PROFILING = False
+TEMPLATE_PROFILING_HEADER_ROWS = 10
+
+TEMPLATES_WARMUP = False
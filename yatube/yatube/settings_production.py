@@ -0,0 +1,80 @@
+"""Настройки для продакшена.
+
+Запуск: DJANGO_SETTINGS_MODULE=yatube.settings_production
+"""
+import os
+from importlib.util import find_spec
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, INSTALLED_APPS, MIDDLEWARE
+from .settings import REPLICA_SNAPSHOT_INTERVAL, TEMPLATES
+
+DEBUG = False
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'debug_toolbar']
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if not middleware.startswith('debug_toolbar.')
+]
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['debug'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+TEMPLATES_WARMUP = True
+
+WRITE_QUEUE_ENABLED = True
+WRITE_QUEUE_LOCK_FILE = os.path.join(BASE_DIR, 'db.sqlite3.writelock')
+COUNTERS_ENABLED = True
+SSE_ENABLED = True
+
+# Общий для процессов кэш на диске, а перед ним LRU в памяти процесса,
+# см. core/cache.py.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'invalidations.log'),
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 30,
+            'SYNC_INTERVAL': 0.5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'shared'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    # Отсутствующие имена из posts/lookups.py, отдельно от горячих ключей.
+    'lookup_misses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'lookup_misses'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+TASKS_EAGER = False
+TASKS_PERIODIC = {
+    'core.tasks.snapshot_replica': REPLICA_SNAPSHOT_INTERVAL,
+    'core.tasks.purge_queues': 60 * 60,
+    'core.tasks.sqlite_maintenance': 24 * 60 * 60,
+}
+if find_spec('scipy') is not None:
+    TASKS_PERIODIC['posts.tasks.refresh_recommendations'] = 10 * 60
+
+# Снимок основной базы обновляет команда snapshot_replica.
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': 'file:{}?mode=ro&immutable=1'.format(
+        os.path.join(BASE_DIR, 'db.replica.sqlite3')
+    ),
+    'CONN_MAX_AGE': 0,
+    'SQLITE_PRAGMAS': {'query_only': 1, 'cache_size': -64 * 1024},
+    'TEST': {'MIRROR': 'default'},
+}
@@ -17,12 +17,25 @@ from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
 
+from core import views as core_views
+
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
 urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
+    path('admin/profiles/', core_views.profiles, name='profiles'),
+    path(
+        'admin/profiles/templates/',
+        core_views.template_stats,
+        name='template_stats'
+    ),
+    path(
+        'admin/profiles/<path:path>',
+        core_views.profile_download,
+        name='profile_download'
+    ),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),